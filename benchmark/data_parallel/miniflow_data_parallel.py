@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import multiprocessing
+import time
+
+import numpy as np
+
+import miniflow as tf
+from miniflow import parallel_trainer
+
+
+def train(worker_number, features, labels, step_number, batch_size):
+  tf.graph._default_graph = tf.Graph()
+
+  weights = tf.Variable(np.zeros(features.shape[1]))
+  bias = tf.Variable(0.0)
+  x = tf.placeholder(tf.float64, shape=[None, features.shape[1]])
+  y = tf.placeholder(tf.float64, shape=[None, features.shape[1]])
+  loss = tf.square(y - (x * weights + bias))
+  optimizer = tf.train.GradientDescentOptimizer(0.1)
+
+  trainer = parallel_trainer.DataParallelTrainer(optimizer, loss,
+                                                 worker_number)
+  start_time = time.time()
+  loss_value = trainer.train({x: features, y: labels}, step_number,
+                             batch_size)
+  end_time = time.time()
+
+  return end_time - start_time, loss_value
+
+
+def main():
+  sample_number = 1000000
+  feature_size = 16
+  step_number = 50
+  batch_size = 400000
+  print("Benchmark scenario: {}, batch size: {}, steps: {}, cpus: {}".format(
+      "data parallel training", batch_size, step_number,
+      multiprocessing.cpu_count()))
+
+  features = np.random.rand(sample_number, feature_size)
+  labels = features * 3.0 + 1.0
+
+  for worker_number in [1, 2, 4]:
+    run_time, loss_value = train(worker_number, features, labels,
+                                 step_number, batch_size)
+    print("Workers: {}, loss: {}, run time(s): {}, samples/s: {}".format(
+        worker_number, loss_value, run_time,
+        step_number * batch_size / run_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def evaluate_loss(batch_size, step_number, config):
+  tf.graph._default_graph = tf.Graph()
+
+  weights = tf.Variable(2.0)
+  bias = tf.Variable(1.0)
+  x = tf.placeholder(tf.float32, shape=[None])
+  y = tf.placeholder(tf.float32, shape=[None])
+  loss = tf.square(y - (weights * x + bias))
+
+  features = np.random.rand(batch_size).astype(np.float32)
+  labels = np.random.rand(batch_size).astype(np.float32)
+
+  with tf.Session(config=config) as sess:
+    start_time = time.time()
+    for _ in range(step_number):
+      sess.run(loss, feed_dict={x: features, y: labels})
+    end_time = time.time()
+
+  return end_time - start_time
+
+
+def main():
+  batch_size = 10000000
+  step_number = 20
+  print("Benchmark scenario: {}, batch size: {}, steps: {}".format(
+      "elementwise fusion", batch_size, step_number))
+
+  for do_elementwise_fusion in [False, True]:
+    config = tf.ConfigProto(do_elementwise_fusion=do_elementwise_fusion)
+    run_time = evaluate_loss(batch_size, step_number, config)
+    print("Elementwise fusion: {}, run time(s): {}".format(
+        do_elementwise_fusion, run_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def train_embedding(vocabulary_size, embedding_size, batch_size, step_number,
+                    is_dense):
+  tf.graph._default_graph = tf.Graph()
+
+  table = tf.Variable(np.random.rand(vocabulary_size, embedding_size))
+  ids = tf.placeholder(tf.int32, shape=[None])
+  targets = tf.placeholder(tf.float64, shape=[None, embedding_size])
+  loss = tf.square(tf.embedding_lookup(table, ids) - targets)
+  train_op = tf.train.GradientDescentOptimizer(0.1).minimize(loss)
+  if is_dense:
+    # The flat parameter buffer applies the gradient of the whole table
+    tf.graph.get_default_graph().flatten_trainable_variables()
+
+  targets_value = np.random.rand(batch_size, embedding_size)
+  with tf.Session() as sess:
+    start_time = time.time()
+    for _ in range(step_number):
+      ids_value = np.random.randint(0, vocabulary_size, batch_size)
+      sess.run(train_op, feed_dict={ids: ids_value, targets: targets_value})
+    end_time = time.time()
+
+  return end_time - start_time
+
+
+def main():
+  embedding_size = 16
+  batch_size = 64
+  step_number = 200
+  print("Benchmark scenario: {}, embedding size: {}, batch size: {}, "
+        "steps: {}".format("embedding lookup", embedding_size, batch_size,
+                           step_number))
+
+  for vocabulary_size in [10000, 100000, 1000000]:
+    for is_dense in [True, False]:
+      run_time = train_embedding(vocabulary_size, embedding_size, batch_size,
+                                 step_number, is_dense)
+      print("Vocabulary size: {}, dense update: {}, run time(s): {}".format(
+          vocabulary_size, is_dense, run_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def build_graph(depth, output_number, sample_number):
+  tf.graph._default_graph = tf.Graph()
+
+  # The deep shared chain of one scalar input and many outputs
+  s = tf.placeholder(tf.float64)
+  x = tf.constant(np.random.rand(sample_number))
+  h = x * s
+  for _ in range(depth):
+    h = h * 0.99 + tf.square(h) * 0.01
+  y_ops = [
+      tf.square(h * float(index + 1) / output_number)
+      for index in range(output_number)
+  ]
+  return s, y_ops
+
+
+def main():
+  depth = 50
+  output_number = 200
+  sample_number = 1000
+  step_number = 10
+  print("Benchmark scenario: {}, depth: {}, outputs: {}, samples: {}, "
+        "steps: {}".format("forward mode", depth, output_number,
+                           sample_number, step_number))
+
+  s, y_ops = build_graph(depth, output_number, sample_number)
+  grad_ops = [tf.gradients(y, [s])[0] for y in y_ops]
+  with tf.Session() as sess:
+    # Build the tangent ops and the execution plans before timing
+    sess.jvp(y_ops, {s: 1.0}, feed_dict={s: 0.5})
+    sess.run(grad_ops, feed_dict={s: 0.5})
+
+    start_time = time.time()
+    for _ in range(step_number):
+      _, jvp_tangents = sess.jvp(y_ops, {s: 1.0}, feed_dict={s: 0.5})
+    end_time = time.time()
+    print("Session.jvp run time(s): {}".format(end_time - start_time))
+
+    # The reverse mode needs one backward pass for each output
+    start_time = time.time()
+    for _ in range(step_number):
+      reverse_tangents = sess.run(grad_ops, feed_dict={s: 0.5})
+    end_time = time.time()
+    print("gradients() run time(s): {}".format(end_time - start_time))
+
+  # The gradients are summed over the samples of each output
+  np.testing.assert_allclose(np.sum(jvp_tangents, axis=1), reverse_tangents)
+
+
+if __name__ == "__main__":
+  main()
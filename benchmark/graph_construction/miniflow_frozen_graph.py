@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import gc
+import time
+import tracemalloc
+
+import miniflow as tf
+from miniflow import executor
+from miniflow import frozen_graph
+
+
+def main():
+  if len(sys.argv) > 1:
+    op_number = int(sys.argv[1])
+  else:
+    op_number = 1000000
+  print("Benchmark scenario: {}, ops: {}".format("frozen graph", op_number))
+
+  tracemalloc.start()
+  tf.graph._default_graph = tf.Graph()
+  one = tf.constant(1.0)
+  result = one
+  for i in range(op_number):
+    result = tf.add(result, one)
+  graph_size = tracemalloc.get_traced_memory()[0]
+  print("Graph size(bytes): {}, bytes/op: {}".format(graph_size, float(
+      graph_size) / op_number))
+
+  frozen = frozen_graph.freeze_graph([result])
+  del one, result
+  tf.graph._default_graph = tf.Graph()
+  # The ops and the graph refer to each other
+  gc.collect()
+  frozen_graph_size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  print("Frozen graph size(bytes): {}, bytes/op: {}".format(
+      frozen_graph_size, float(frozen_graph_size) / op_number))
+
+  plan = executor.FrozenExecutionPlan(frozen)
+  start_time = time.time()
+  print("Result: {}".format(plan.run()[0]))
+  end_time = time.time()
+  print("Run time(s): {}".format(end_time - start_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import miniflow as tf
+
+
+def build_graph(op_number):
+  tf.graph._default_graph = tf.Graph()
+
+  start_time = time.time()
+  one = tf.constant(1.0)
+  result = one
+  for i in range(op_number):
+    result = tf.add(result, one)
+  end_time = time.time()
+
+  return end_time - start_time
+
+
+def main():
+  if len(sys.argv) > 1:
+    op_numbers = [int(op_number) for op_number in sys.argv[1:]]
+  else:
+    op_numbers = [10000, 100000, 1000000, 2000000]
+
+  for op_number in op_numbers:
+    run_time = build_graph(op_number)
+    print("Benchmark scenario: {}, ops: {}, run time(s): {}, us/op: {}".format(
+        "graph construction", op_number, run_time,
+        1000000 * run_time / op_number))
+
+
+if __name__ == "__main__":
+  main()
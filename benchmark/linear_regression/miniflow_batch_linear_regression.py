@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import numpy as np
+import time
+
+import miniflow as tf
+
+
+def main():
+  sample_number = 1000000
+  batch_size = 100000
+  epoch_number = 10
+  print("Benchmark scenario: {}, samples: {}, batch size: {}".format(
+      "mini-batch linear regression", sample_number, batch_size))
+
+  train_features = np.random.rand(sample_number).astype(np.float32)
+  train_labels = 10 * train_features + 3
+
+  weights = tf.Variable(0.0)
+  bias = tf.Variable(0.0)
+  x = tf.placeholder(tf.float32, shape=[None])
+  y = tf.placeholder(tf.float32, shape=[None])
+
+  predict = weights * x + bias
+  loss = tf.square(y - predict)
+  sgd_optimizer = tf.train.GradientDescentOptimizer(0.5)
+  train_op = sgd_optimizer.minimize(loss)
+
+  with tf.Session() as sess:
+    start_time = time.time()
+    for epoch_index in range(epoch_number):
+      for batch_start in range(0, sample_number, batch_size):
+        batch_end = batch_start + batch_size
+        sess.run(
+            train_op,
+            feed_dict={
+                x: train_features[batch_start:batch_end],
+                y: train_labels[batch_start:batch_end]
+            })
+    end_time = time.time()
+
+  print("Weight: {}, bias: {}".format(weights.get_value(), bias.get_value()))
+  print("Run time(s): {}".format(end_time - start_time))
+  print("Samples/sec: {}".format(
+      epoch_number * sample_number / (end_time - start_time)))
+
+
+if __name__ == "__main__":
+  main()
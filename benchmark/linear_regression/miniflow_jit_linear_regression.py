@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import miniflow as tf
+import time
+
+
+def linear_regression(epoch_number, config):
+  learning_rate = 0.01
+  train_features = [1.0, 2.0, 3.0, 4.0, 5.0]
+  train_labels = [10.0, 20.0, 30.0, 40.0, 50.0]
+
+  weights = tf.Variable(0.0)
+  bias = tf.Variable(0.0)
+  x = tf.placeholder(tf.float32)
+  y = tf.placeholder(tf.float32)
+
+  predict = weights * x + bias
+  loss = tf.square(y - predict)
+  train_op = tf.train.GradientDescentOptimizer(learning_rate).minimize(loss)
+
+  with tf.Session(config=config) as sess:
+    for epoch_index in range(epoch_number):
+      sample_index = epoch_index % len(train_features)
+      sess.run(
+          train_op,
+          feed_dict={x: train_features[sample_index],
+                     y: train_labels[sample_index]})
+      loss_value = sess.run(loss, feed_dict={x: 1.0, y: 10.0})
+
+  return loss_value
+
+
+def main():
+  epoch_number = 100000
+  print("Benchmark scenario: {}, epoch: {}".format(
+      "linear regression with jit", epoch_number))
+
+  for global_jit_level in [0, 1]:
+    config = tf.ConfigProto(global_jit_level=global_jit_level)
+    start_time = time.time()
+    loss_value = linear_regression(epoch_number, config)
+    end_time = time.time()
+    print("Global jit level: {}, loss: {}, run time(s): {}".format(
+        global_jit_level, loss_value, end_time - start_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def train(batch_size, step_number, config):
+  tf.graph._default_graph = tf.Graph()
+
+  weights = tf.Variable(0.0)
+  bias = tf.Variable(0.0)
+  x = tf.placeholder(tf.float32, shape=[None])
+  y = tf.placeholder(tf.float32, shape=[None])
+  loss = tf.square(y - (weights * x + bias))
+  train_op = tf.train.GradientDescentOptimizer(0.1).minimize(loss)
+
+  features = np.random.rand(batch_size).astype(np.float32)
+  labels = (10 * features + 3).astype(np.float32)
+
+  run_metadata = tf.RunMetadata()
+  with tf.Session(config=config) as sess:
+    start_time = time.time()
+    for _ in range(step_number):
+      sess.run(train_op, feed_dict={x: features, y: labels},
+               run_metadata=run_metadata)
+    end_time = time.time()
+
+  return end_time - start_time, run_metadata.peak_arena_size
+
+
+def main():
+  batch_size = 1000000
+  step_number = 100
+  print("Benchmark scenario: {}, batch size: {}, steps: {}".format(
+      "memory planning", batch_size, step_number))
+
+  for do_memory_planning in [False, True]:
+    config = tf.ConfigProto(do_memory_planning=do_memory_planning)
+    run_time, peak_arena_size = train(batch_size, step_number, config)
+    print("Memory planning: {}, run time(s): {}, peak arena size: {}".format(
+        do_memory_planning, run_time, peak_arena_size))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def train_to_target_loss(optimizer, features, labels, target_loss,
+                         max_step_number):
+  """Return the steps and the seconds to reach the target loss."""
+  tf.graph._default_graph = tf.Graph()
+  optimizer.set_graph(tf.graph.get_default_graph())
+
+  first_weight = tf.Variable(0.0)
+  second_weight = tf.Variable(0.0)
+  bias = tf.Variable(0.0)
+  first_x = tf.placeholder(tf.float64, shape=[None])
+  second_x = tf.placeholder(tf.float64, shape=[None])
+  y = tf.placeholder(tf.float64, shape=[None])
+  loss = tf.square(y - (first_x * first_weight + second_x * second_weight +
+                        bias))
+  train_op = optimizer.minimize(loss)
+
+  feed_dict = {first_x: features[:, 0], second_x: features[:, 1], y: labels}
+  with tf.Session() as sess:
+    start_time = time.time()
+    for step_index in range(max_step_number):
+      _, loss_value = sess.run([train_op, loss], feed_dict=feed_dict)
+      if np.mean(loss_value) < target_loss:
+        return step_index + 1, time.time() - start_time
+  return None, time.time() - start_time
+
+
+def main():
+  sample_number = 10000
+  target_loss = 0.001
+  max_step_number = 20000
+  print("Benchmark scenario: {}, samples: {}, target loss: {}".format(
+      "ill-conditioned linear regression", sample_number, target_loss))
+
+  # The scales of the features differ by 100 times
+  features = np.random.rand(sample_number, 2) * [1.0, 100.0]
+  labels = np.dot(features, [2.0, -0.03]) + 1.0
+
+  for optimizer in [
+      tf.train.GradientDescentOptimizer(0.0002),
+      tf.train.MomentumOptimizer(0.0002, 0.9),
+      tf.train.AdagradOptimizer(0.5),
+      tf.train.AdamOptimizer(0.1, 0.9, 0.999, 1e-8)
+  ]:
+    step_number, run_time = train_to_target_loss(
+        optimizer, features, labels, target_loss, max_step_number)
+    print("Optimizer: {}, steps: {}, run time(s): {}".format(
+        optimizer.get_name(), step_number, run_time))
+
+
+if __name__ == "__main__":
+  main()
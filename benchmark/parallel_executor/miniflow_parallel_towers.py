@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import multiprocessing
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def run_towers(tower_number, batch_size, step_number, config):
+  tf.graph._default_graph = tf.Graph()
+
+  x = tf.placeholder(tf.float64, shape=[None])
+  towers = []
+  for i in range(tower_number):
+    weights = tf.Variable(float(i))
+    towers.append(tf.square(x * weights + 1.0) / 2.0 - x)
+  total = tf.ops.AddNOp(*towers)
+
+  features = np.random.rand(batch_size)
+  with tf.Session(config=config) as sess:
+    start_time = time.time()
+    for _ in range(step_number):
+      sess.run(total, feed_dict={x: features})
+    end_time = time.time()
+
+  return end_time - start_time
+
+
+def main():
+  tower_number = 16
+  batch_size = 1000000
+  step_number = 10
+  print("Benchmark scenario: {}, towers: {}, batch size: {}, cpus: {}".format(
+      "parallel towers", tower_number, batch_size,
+      multiprocessing.cpu_count()))
+
+  for inter_op_parallelism_threads in [0, 2, 4, 8]:
+    config = tf.ConfigProto(
+        inter_op_parallelism_threads=inter_op_parallelism_threads)
+    run_time = run_towers(tower_number, batch_size, step_number, config)
+    print("Inter op parallelism threads: {}, run time(s): {}".format(
+        inter_op_parallelism_threads, run_time))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import time
+
+import numpy as np
+
+import miniflow as tf
+
+
+def run_updates(variable_number, variable_size, step_number, is_flattened):
+  tf.graph._default_graph = tf.Graph()
+
+  variables = [
+      tf.Variable(np.random.rand(variable_size))
+      for _ in range(variable_number)
+  ]
+  optimizer = tf.train.GradientDescentOptimizer(0.01)
+  if is_flattened:
+    tf.graph.get_default_graph().flatten_trainable_variables()
+
+  variablename_grad_map = {
+      variable.get_name(): np.random.rand(variable_size)
+      for variable in variables
+  }
+  start_time = time.time()
+  for _ in range(step_number):
+    optimizer.apply_gradients(variablename_grad_map)
+  end_time = time.time()
+
+  return end_time - start_time
+
+
+def main():
+  step_number = 1000
+  print("Benchmark scenario: {}, steps: {}".format("apply gradients",
+                                                   step_number))
+
+  for variable_number, variable_size in [(1000, 10), (100, 1000),
+                                         (10, 100000)]:
+    for is_flattened in [False, True]:
+      run_time = run_updates(variable_number, variable_size, step_number,
+                             is_flattened)
+      print("Variables: {} x {}, flattened: {}, run time(s): {}".format(
+          variable_number, variable_size, is_flattened, run_time))
+
+
+if __name__ == "__main__":
+  main()
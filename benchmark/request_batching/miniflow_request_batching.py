@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+sys.path.append("../../")
+
+import threading
+import time
+
+import numpy as np
+
+import miniflow as tf
+from miniflow.batching import BatchingSession
+
+
+def build_model(layer_number):
+  tf.graph._default_graph = tf.Graph()
+
+  x = tf.placeholder(tf.float64, shape=[None, 16])
+  y = x
+  for i in range(layer_number):
+    y = tf.square(y * tf.Variable(0.5) + tf.Variable(float(i))) / 100.0
+  return x, y
+
+
+def serve(run, request_number, client_number):
+  """Send the requests from the client threads and return the latencies."""
+  latencies = []
+  lock = threading.Lock()
+
+  def client():
+    sample = np.random.rand(16)
+    for _ in range(request_number // client_number):
+      start_time = time.time()
+      run(sample)
+      with lock:
+        latencies.append(time.time() - start_time)
+
+  threads = [threading.Thread(target=client) for _ in range(client_number)]
+  start_time = time.time()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return len(latencies) / (time.time() - start_time), latencies
+
+
+def main():
+  layer_number = 20
+  request_number = 20000
+  client_number = 32
+  print("Benchmark scenario: {}, layers: {}, requests: {}, clients: {}".format(
+      "request batching", layer_number, request_number, client_number))
+
+  x, y = build_model(layer_number)
+  sess = tf.Session()
+  requests_per_second, latencies = serve(
+      lambda sample: sess.run(y, feed_dict={x: sample[np.newaxis]})[0],
+      request_number, client_number)
+  print("Without batching, requests/s: {}, p99 latency(ms): {}".format(
+      requests_per_second, np.percentile(latencies, 99) * 1000))
+
+  for max_batch_size in [8, 32]:
+    batching_session = BatchingSession(
+        sess, max_batch_size=max_batch_size, batch_timeout=0.002)
+    requests_per_second, latencies = serve(
+        lambda sample: batching_session.run(y, feed_dict={x: sample}),
+        request_number, client_number)
+    print("Max batch size: {}, requests/s: {}, p99 latency(ms): {}, "
+          "mean batch size: {}".format(
+              max_batch_size, requests_per_second,
+              np.percentile(latencies, 99) * 1000,
+              batching_session.get_request_number() /
+              batching_session.get_batch_number()))
+
+
+if __name__ == "__main__":
+  main()
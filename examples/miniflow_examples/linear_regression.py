@@ -48,11 +48,13 @@ def linear_regression(customized_epoch_number=None, verbose=True):
 
       # Update model variables and print loss
       sess.run(train_op, feed_dict={x: train_feature, y: train_label})
-      loss_value = sess.run(loss, feed_dict={x: 1.0, y: 10.0})
+      loss_value, weights_value, bias_value = sess.run(
+          [loss, weights, bias], feed_dict={x: 1.0,
+                                            y: 10.0})
 
       if verbose:
         print("Epoch: {}, loss: {}, weight: {}, bias: {}".format(
-            epoch_index, loss_value, sess.run(weights), sess.run(bias)))
+            epoch_index, loss_value, weights_value, bias_value))
 
 
 def linear_regression_raw_api():
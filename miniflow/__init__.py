@@ -20,6 +20,8 @@ tf.float32
 tf.float64
 tf.Graph
 tf.Session
+tf.ConfigProto
+tf.RunMetadata
 tf.Variable
 tf.placeholder
 tf.constant
@@ -28,27 +30,37 @@ tf.minus
 tf.multiple
 tf.divide
 tf.square
+tf.embedding_lookup
+tf.gradients
 tf.global_variables_initializer
 tf.local_variables_initialize
 tf.get_variable
 """
 
+import numpy as np
+
 # TODO: Need to import all after installation
+from . import config
+from . import gradients_impl
 from . import graph
+from . import graph_transforms
 from . import session
 from . import ops
 from . import optimizer
 from . import train
 from . import webhdfs
 
-int32 = int
-float32 = float
-float64 = float
+int32 = np.int32
+float32 = np.float32
+float64 = np.float64
 
 Graph = graph.Graph
 
 Session = session.Session
 
+ConfigProto = config.ConfigProto
+RunMetadata = config.RunMetadata
+
 Variable = ops.VariableOp
 placeholder = ops.PlaceholderOp
 constant = ops.ConstantOp
@@ -57,6 +69,8 @@ minus = ops.MinusOp
 multiple = ops.MultipleOp
 divide = ops.DivideOp
 square = ops.SquareOp
+embedding_lookup = ops.EmbeddingLookupOp
+gradients = gradients_impl.gradients
 global_variables_initializer = ops.GlobalVariablesInitializerOp
 local_variables_initializer = ops.LocalVariablesInitializerOp
 get_variable = ops.get_variable
\ No newline at end of file
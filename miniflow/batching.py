@@ -0,0 +1,161 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module batches the concurrent requests of the same fetches."""
+
+import threading
+import time
+
+import numpy as np
+
+from . import ops
+from . import session as session_lib
+
+
+class BatchingSession(object):
+  """
+  The front-end of Session which merges the concurrent runs of the same
+  fetches. The first request of a batch waits up to batch_timeout seconds
+  or until max_batch_size requests join, then it stacks the fed samples
+  along a new first axis, runs the plan once and splits the results along
+  the first axis for the callers. The fetches must be computed sample by
+  sample, because the reductions over the batch axis mix the requests.
+  """
+
+  def __init__(self, sess=None, max_batch_size=32, batch_timeout=0.001):
+    if sess is None:
+      sess = session_lib.Session()
+    self._session = sess
+    self._max_batch_size = max_batch_size
+    self._batch_timeout = batch_timeout
+
+    # The batches which accept the requests keyed by the fetch ops and the
+    # feed keys
+    self._open_batch_map = {}
+    self._condition = threading.Condition()
+
+    # The statistics of the batched runs
+    self._batch_number = 0
+    self._request_number = 0
+
+  def get_session(self):
+    return self._session
+
+  def get_max_batch_size(self):
+    return self._max_batch_size
+
+  def get_batch_timeout(self):
+    return self._batch_timeout
+
+  def get_batch_number(self):
+    return self._batch_number
+
+  def get_request_number(self):
+    return self._request_number
+
+  def run(self, fetches, feed_dict=None):
+    """
+    Run the fetches for the fed sample in a batch with the other concurrent
+    requests and return the results of this sample.
+    """
+    if isinstance(fetches, ops.Op):
+      fetch_ops = [fetches]
+    else:
+      fetch_ops = []
+      session_lib._flatten_fetches(fetches, fetch_ops)
+    if not feed_dict:
+      feed_dict = {}
+
+    batch_key = (tuple(fetch_ops), frozenset(feed_dict.keys()))
+    with self._condition:
+      batch = self._open_batch_map.get(batch_key)
+      is_leader = batch is None
+      if is_leader:
+        batch = _Batch(fetch_ops, feed_dict.keys())
+        self._open_batch_map[batch_key] = batch
+
+      request_index = batch.add_request(feed_dict)
+      if batch.get_size() >= self._max_batch_size:
+        del self._open_batch_map[batch_key]
+        self._condition.notify_all()
+
+      if is_leader:
+        # Wait for the other requests until the batch is full or timeout
+        deadline = time.time() + self._batch_timeout
+        while self._open_batch_map.get(batch_key) is batch:
+          remaining_time = deadline - time.time()
+          if remaining_time <= 0:
+            del self._open_batch_map[batch_key]
+            break
+          self._condition.wait(remaining_time)
+
+    if is_leader:
+      batch.run(self._session)
+      with self._condition:
+        self._batch_number += 1
+        self._request_number += batch.get_size()
+    else:
+      batch.wait()
+
+    results = batch.get_results(request_index)
+    if isinstance(fetches, ops.Op):
+      return results[0]
+    return session_lib._pack_results(fetches, iter(results))
+
+
+class _Batch(object):
+  """The requests which are run together and their results."""
+
+  def __init__(self, fetch_ops, feed_keys):
+    self._fetch_ops = fetch_ops
+    self._feed_keys = list(feed_keys)
+    self._feed_dicts = []
+
+    # The results of each fetch op, or the error raised by the run
+    self._results = None
+    self._error = None
+    self._done_event = threading.Event()
+
+  def get_size(self):
+    return len(self._feed_dicts)
+
+  def add_request(self, feed_dict):
+    self._feed_dicts.append(feed_dict)
+    return len(self._feed_dicts) - 1
+
+  def run(self, sess):
+    """Run the stacked feeds and wake up the other requests."""
+    try:
+      batch_feed_dict = {
+          feed_key: np.stack([
+              np.asarray(feed_dict[feed_key]) for feed_dict in self._feed_dicts
+          ]) for feed_key in self._feed_keys
+      }
+      self._results = sess.run(self._fetch_ops, feed_dict=batch_feed_dict)
+      for fetch_op, result in zip(self._fetch_ops, self._results):
+        if np.shape(result)[:1] != (len(self._feed_dicts),):
+          raise ValueError(
+              "The result of {} cannot be split for the batch of {}".format(
+                  fetch_op.get_name(), len(self._feed_dicts)))
+    except Exception as error:
+      self._error = error
+    finally:
+      self._done_event.set()
+
+  def wait(self):
+    self._done_event.wait()
+
+  def get_results(self, request_index):
+    if self._error is not None:
+      raise self._error
+    return [result[request_index] for result in self._results]
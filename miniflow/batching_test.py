@@ -0,0 +1,89 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.batching import BatchingSession
+
+
+class BatchingSessionTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def run_in_threads(self, function, arguments):
+    results = [None] * len(arguments)
+
+    def run(index):
+      results[index] = function(arguments[index])
+
+    threads = [
+        threading.Thread(target=run, args=(index,))
+        for index in range(len(arguments))
+    ]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    return results
+
+  def test_run(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    y = ops.SquareOp(x) + 1.0
+    batching_session = BatchingSession(max_batch_size=8, batch_timeout=1.0)
+
+    samples = [
+        np.array([index, -index], dtype=np.float64) for index in range(16)
+    ]
+    results = self.run_in_threads(
+        lambda sample: batching_session.run({"y": y, "x": [x]},
+                                            feed_dict={x: sample}), samples)
+
+    for sample, result in zip(samples, results):
+      np.testing.assert_array_equal(result["y"], sample**2 + 1.0)
+      np.testing.assert_array_equal(result["x"][0], sample)
+    self.assertEqual(batching_session.get_request_number(), 16)
+    self.assertEqual(batching_session.get_batch_number(), 2)
+
+  def test_run_timeout(self):
+    x = ops.PlaceholderOp(np.float64)
+    y = x * 3.0
+    batching_session = BatchingSession(max_batch_size=32, batch_timeout=0.001)
+
+    self.assertEqual(batching_session.run(y, feed_dict={x: 2.0}), 6.0)
+    self.assertEqual(batching_session.run(y, feed_dict={x: 3.0}), 9.0)
+    self.assertEqual(batching_session.get_batch_number(), 2)
+
+  def test_run_error(self):
+    x = ops.PlaceholderOp(np.float64)
+    total = ops.VariableOp(1.0) + 0.0
+    batching_session = BatchingSession(max_batch_size=4, batch_timeout=1.0)
+
+    def run(sample):
+      try:
+        return batching_session.run([x, total], feed_dict={x: sample})
+      except ValueError as error:
+        return error
+
+    results = self.run_in_threads(run, [1.0, 2.0, 3.0, 4.0])
+    for result in results:
+      self.assertIsInstance(result, ValueError)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,59 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class ConfigProto(object):
+  """The options of Session which are compatiable with TensorFlow."""
+
+  def __init__(self,
+               do_constant_folding=False,
+               do_common_subexpression_elimination=False,
+               do_elementwise_fusion=False,
+               do_memory_planning=False,
+               global_jit_level=0,
+               inter_op_parallelism_threads=0):
+    # Fold the constant subgraphs before compiling the execution plans
+    self.do_constant_folding = do_constant_folding
+
+    # Merge the duplicated ops before compiling the execution plans
+    self.do_common_subexpression_elimination = (
+        do_common_subexpression_elimination)
+
+    # Fuse the trees of elementwise ops into kernels with in-place buffers
+    self.do_elementwise_fusion = do_elementwise_fusion
+
+    # Reuse the planned buffers of the intermediate values across the runs
+    # with the same feed shapes, which is ignored by the compiled plans
+    self.do_memory_planning = do_memory_planning
+
+    # Compile the execution plans to Python functions if it is positive
+    self.global_jit_level = global_jit_level
+
+    # Run the independent ops in the thread pool of this size if it is more
+    # than one. The ops without dependencies between them run in any order
+    self.inter_op_parallelism_threads = inter_op_parallelism_threads
+
+
+class RunMetadata(object):
+  """The metadata which is filled by Session.run() if passed."""
+
+  def __init__(self):
+    # The number of ops evaluated by the run
+    self.executed_op_number = 0
+
+    # The number of ops in graph which are not required by the fetches
+    self.pruned_op_number = 0
+
+    # The bytes of the buffers which are reused by the memory planner
+    self.peak_arena_size = 0
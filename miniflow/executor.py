@@ -0,0 +1,237 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module contains the compiled execution plans used by Session."""
+
+import numpy as np
+
+from . import frozen_graph as frozen_graph_lib
+from . import fusion
+from . import graph
+from . import memory_planner
+from . import ops
+from . import parallel_executor
+
+
+class ExecutionPlan(object):
+  """
+  The compiled execution plan of the fetch ops for one set of feed keys. All
+  the fetch ops are evaluated in one pass and share their ancestors. It
+  resolves the pruned op list, the placeholders and the input slots once, so
+  running it only looks up values by index.
+  """
+
+  def __init__(self, fetch_ops, feed_keys, graph_instance, config=None):
+    self._graph_version = graph_instance.get_version()
+
+    # Fetch the ops which replace the original ops in graph transforms
+    fetch_ops = [graph_instance.get_replacement(op) for op in fetch_ops]
+    self._ops = graph.get_topological_order(fetch_ops)
+    op_slot_map = {op: slot for slot, op in enumerate(self._ops)}
+    self._fetch_slots = [op_slot_map[fetch_op] for fetch_op in fetch_ops]
+
+    # The fetched variables whose arrays may be updated in place later
+    self._fetched_variables = [
+        (index, fetch_op) for index, fetch_op in enumerate(fetch_ops)
+        if isinstance(fetch_op, ops.VariableOp)
+    ]
+
+    # Example: {"Placeholer_1": (0, cast)} or {PlaceholderOp: (0, cast)}
+    self._feed_key_slot_map = {}
+    name_op_map = graph_instance.get_name_op_map()
+    for feed_key in feed_keys:
+      if isinstance(feed_key, str):
+        placeholder_op = name_op_map[feed_key]
+      else:
+        placeholder_op = feed_key
+
+      # Ignore the placeholders which are not required by the fetch ops
+      if isinstance(placeholder_op,
+                    ops.PlaceholderOp) and placeholder_op in op_slot_map:
+        self._feed_key_slot_map[feed_key] = (op_slot_map[placeholder_op],
+                                             placeholder_op.cast_value)
+
+    # The placeholders which are pruned do not need to be fed
+    fed_slots = set(slot for slot, _ in self._feed_key_slot_map.values())
+    self._steps = []
+    for slot, op in enumerate(self._ops):
+      if slot not in fed_slots:
+        input_slots = [op_slot_map[input_op] for input_op in op.get_inputs()]
+        self._steps.append((slot, op.compute, input_slots))
+
+    # Example: {3: FusedElementwiseKernel}
+    self._slot_kernel_map = {}
+    if config is not None and config.do_elementwise_fusion:
+      self._steps, self._slot_kernel_map = fusion.fuse_elementwise_ops(
+          self._ops, self._steps, self._fetch_slots)
+
+    self._memory_planner = None
+    if config is not None and config.do_memory_planning:
+      self._memory_planner = memory_planner.MemoryPlanner(
+          self._ops, self._steps, fed_slots, self._fetch_slots,
+          self._slot_kernel_map)
+
+    # Create the scheduler when the plan is run with a thread pool
+    self._parallel_scheduler = None
+
+    # The elements of the constants and variables for estimating the cost
+    self._static_cost = parallel_executor.estimate_cost(
+        op.get_value() for op in self._ops
+        if isinstance(op, (ops.ConstantOp, ops.VariableOp)))
+
+    self._pruned_op_number = max(
+        len(graph_instance.get_name_op_map()) - len(self._ops), 0)
+
+  def get_graph_version(self):
+    return self._graph_version
+
+  def get_ops(self):
+    return self._ops
+
+  def get_slot_kernel_map(self):
+    return self._slot_kernel_map
+
+  def get_peak_arena_size(self):
+    if self._memory_planner is None:
+      return 0
+    return self._memory_planner.get_arena_size()
+
+  def get_executed_op_number(self):
+    return len(self._steps)
+
+  def get_pruned_op_number(self):
+    return self._pruned_op_number
+
+  def estimate_cost(self, feed_dict=None):
+    """Return the number of the steps and the leaf elements as the cost."""
+    cost = len(self._steps) + self._static_cost
+    if feed_dict:
+      cost += parallel_executor.estimate_cost(feed_dict.values())
+    return cost
+
+  def run(self, feed_dict=None, thread_pool=None):
+    """
+    Run the plan and return the values of the fetch ops. The independent
+    steps run in the thread pool if it is given, except that the memory
+    planner always runs the steps in order.
+    """
+    values = [None] * len(self._ops)
+
+    if feed_dict:
+      feed_key_slot_map = self._feed_key_slot_map
+      for feed_key, value in feed_dict.items():
+        if feed_key in feed_key_slot_map:
+          slot, cast_value = feed_key_slot_map[feed_key]
+          values[slot] = cast_value(value)
+
+    if self._memory_planner is not None:
+      self._memory_planner.run_steps(values)
+    elif thread_pool is not None:
+      if self._parallel_scheduler is None:
+        self._parallel_scheduler = parallel_executor.ParallelScheduler(
+            self._steps)
+      self._parallel_scheduler.run_steps(values, thread_pool)
+    else:
+      for slot, compute, input_slots in self._steps:
+        input_values = [values[input_slot] for input_slot in input_slots]
+        values[slot] = compute(*input_values)
+
+    return self._copy_fetched_variables(
+        [values[fetch_slot] for fetch_slot in self._fetch_slots])
+
+  def _copy_fetched_variables(self, results):
+    """
+    Copy the values of the fetched variables which are updated in place, so
+    the fetched values are not changed by the following training steps.
+    The other steps read the arrays without copying.
+    """
+    for index, variable in self._fetched_variables:
+      if variable.is_in_place():
+        results[index] = np.array(results[index])
+    return results
+
+
+class FrozenExecutionPlan(object):
+  """
+  The execution plan which runs the FrozenGraph directly. It dispatches on
+  the opcode array and reads the inputs from the index arrays, so no op
+  objects are needed for the nodes with opcodes.
+  """
+
+  def __init__(self, frozen_graph):
+    self._frozen_graph = frozen_graph
+
+  def get_frozen_graph(self):
+    return self._frozen_graph
+
+  def get_executed_op_number(self):
+    return self._frozen_graph.get_node_number() - len(
+        self._frozen_graph.get_placeholder_name_index_map())
+
+  def run(self, feed_dict=None):
+    frozen_graph = self._frozen_graph
+    attributes = frozen_graph.get_attributes()
+    values = [None] * frozen_graph.get_node_number()
+
+    # The memoryviews return Python ints which are faster to index with
+    opcodes = memoryview(frozen_graph.get_opcodes())
+    input_offsets = memoryview(frozen_graph.get_input_offsets())
+    input_indexes = memoryview(frozen_graph.get_input_indexes())
+    attribute_indexes = memoryview(frozen_graph.get_attribute_indexes())
+
+    # Feed the placeholders by name or by PlaceholderOp
+    fed_indexes = set()
+    placeholder_name_index_map = frozen_graph.get_placeholder_name_index_map()
+    for feed_key, value in (feed_dict or {}).items():
+      if not isinstance(feed_key, str):
+        feed_key = feed_key.get_name()
+      if feed_key in placeholder_name_index_map:
+        index = placeholder_name_index_map[feed_key]
+        name, dtype, shape = attributes[attribute_indexes[index]]
+        values[index] = ops._cast_value(value, dtype, shape, name)
+        fed_indexes.add(index)
+
+    for index in range(len(values)):
+      opcode = opcodes[index]
+      offset = input_offsets[index]
+
+      if opcode == frozen_graph_lib.ADD_OPCODE:
+        values[index] = values[input_indexes[offset]] + values[input_indexes[
+            offset + 1]]
+      elif opcode == frozen_graph_lib.MULTIPLE_OPCODE:
+        values[index] = values[input_indexes[offset]] * values[input_indexes[
+            offset + 1]]
+      elif opcode == frozen_graph_lib.MINUS_OPCODE:
+        values[index] = values[input_indexes[offset]] - values[input_indexes[
+            offset + 1]]
+      elif opcode == frozen_graph_lib.DIVIDE_OPCODE:
+        values[index] = values[input_indexes[offset]] / values[input_indexes[
+            offset + 1]]
+      elif opcode == frozen_graph_lib.POWER_OPCODE:
+        values[index] = pow(values[input_indexes[offset]],
+                            attributes[attribute_indexes[index]])
+      elif opcode == frozen_graph_lib.CONSTANT_OPCODE:
+        values[index] = attributes[attribute_indexes[index]]
+      elif opcode == frozen_graph_lib.PLACEHOLDER_OPCODE:
+        if index not in fed_indexes:
+          raise ValueError("You must feed a value for placeholder {}".format(
+              attributes[attribute_indexes[index]][0]))
+      else:
+        input_values = [
+            values[input_index] for input_index in
+            input_indexes[offset:input_offsets[index + 1]]
+        ]
+        values[index] = attributes[attribute_indexes[index]].compute(
+            *input_values)
+
+    return [values[index] for index in frozen_graph.get_fetch_indexes()]
@@ -0,0 +1,156 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module builds the tangent ops of the forward-mode derivatives."""
+
+from . import graph
+from . import ops
+
+# The tangent functions of the op types which are registered below
+_OP_TYPE_TANGENT_FUNCTION_MAP = {}
+
+
+def register_tangent(op_type):
+  """
+  Return the decorator which registers the tangent function of the op type.
+  The function takes the op and the tangent ops of its inputs, which are
+  None for the inputs without tangents, and returns the tangent op of its
+  output or None.
+  """
+
+  def decorator(tangent_function):
+    _OP_TYPE_TANGENT_FUNCTION_MAP[op_type] = tangent_function
+    return tangent_function
+
+  return decorator
+
+
+def build_tangents(fetch_ops, input_ops):
+  """
+  Build the ops which propagate the tangents of the input ops to the fetch
+  ops in topological order. Return the placeholders of the input tangents
+  and the tangent ops of the fetch ops, or None if the fetch op does not
+  depend on the inputs. The tangent ops may be broadcast to the shapes of
+  the values.
+  """
+  tangent_placeholders = [
+      ops.PlaceholderOp(name="Tangent") for _ in input_ops
+  ]
+  op_tangent_map = dict(zip(input_ops, tangent_placeholders))
+
+  for op in graph.get_topological_order(fetch_ops):
+    if op in op_tangent_map:
+      continue
+
+    input_tangents = [
+        op_tangent_map.get(input_op) for input_op in op.get_inputs()
+    ]
+    if all(input_tangent is None for input_tangent in input_tangents):
+      continue
+
+    tangent_function = _OP_TYPE_TANGENT_FUNCTION_MAP.get(type(op))
+    if tangent_function is None:
+      raise NotImplementedError("No tangent function for {}".format(
+          type(op).__name__))
+    tangent_op = tangent_function(op, input_tangents)
+    if tangent_op is not None:
+      op_tangent_map[op] = tangent_op
+
+  return tangent_placeholders, [
+      op_tangent_map.get(fetch_op) for fetch_op in fetch_ops
+  ]
+
+
+def _add_tangents(tangent1, tangent2):
+  """Return the sum of the tangent ops which may be None."""
+  if tangent1 is None:
+    return tangent2
+  elif tangent2 is None:
+    return tangent1
+  else:
+    return ops.AddOp(tangent1, tangent2)
+
+
+@register_tangent(ops.AddOp)
+def _add_tangent(op, input_tangents):
+  return _add_tangents(*input_tangents)
+
+
+@register_tangent(ops.AddNOp)
+def _add_n_tangent(op, input_tangents):
+  tangent = None
+  for input_tangent in input_tangents:
+    tangent = _add_tangents(tangent, input_tangent)
+  return tangent
+
+
+@register_tangent(ops.MinusOp)
+def _minus_tangent(op, input_tangents):
+  tangent1, tangent2 = input_tangents
+  if tangent2 is None:
+    return tangent1
+  elif tangent1 is None:
+    return tangent2 * -1.0
+  else:
+    return tangent1 - tangent2
+
+
+@register_tangent(ops.MultipleOp)
+def _multiple_tangent(op, input_tangents):
+  input_op1, input_op2 = op.get_inputs()
+  tangent1, tangent2 = input_tangents
+  return _add_tangents(None if tangent1 is None else tangent1 * input_op2,
+                       None if tangent2 is None else input_op1 * tangent2)
+
+
+@register_tangent(ops.DivideOp)
+def _divide_tangent(op, input_tangents):
+  input_op1, input_op2 = op.get_inputs()
+  tangent1, tangent2 = input_tangents
+  return _add_tangents(
+      None if tangent1 is None else tangent1 / input_op2,
+      None if tangent2 is None else
+      input_op1 * tangent2 / (input_op2 * input_op2) * -1.0)
+
+
+@register_tangent(ops.PowerOp)
+@register_tangent(ops.SquareOp)
+@register_tangent(ops.CubicOp)
+def _power_tangent(op, input_tangents):
+  input_op = op.get_inputs()[0]
+  power = op.get_power()
+  if power == 2:
+    return input_tangents[0] * 2.0 * input_op
+  return input_tangents[0] * float(power) * ops.PowerOp(input_op, power - 1)
+
+
+@register_tangent(ops.EmbeddingLookupOp)
+def _embedding_lookup_tangent(op, input_tangents):
+  # The tangent of params should have the shape of params
+  if input_tangents[0] is None:
+    return None
+  return ops.EmbeddingLookupOp(input_tangents[0], op.get_inputs()[1])
+
+
+@register_tangent(ops.UnbroadcastOp)
+def _unbroadcast_tangent(op, input_tangents):
+  # The input only provides the shape
+  if input_tangents[0] is None:
+    return None
+  return ops.UnbroadcastOp(input_tangents[0], op.get_inputs()[1])
+
+
+@register_tangent(ops.LossGradientOp)
+def _loss_gradient_tangent(op, input_tangents):
+  # The initial gradient only depends on the shape of the loss
+  return None
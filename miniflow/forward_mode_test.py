@@ -0,0 +1,126 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+import numpy as np
+
+from miniflow import forward_mode
+from miniflow import gradients_impl
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.session import Session
+
+
+class ForwardModeTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_jvp(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    w = ops.VariableOp(np.array([1.0, 2.0, 3.0]))
+    y = ops.CubicOp(x * w / (x + 2.0) - 1.0)
+    z = ops.PowerOp(w, 0.5)
+
+    x_value = np.array([1.0, 2.0, 3.0])
+    tangent = np.array([0.5, -1.0, 2.0])
+    with Session() as sess:
+      (y_value, z_value), (y_tangent, z_tangent) = sess.jvp(
+          [y, z], {x: tangent}, feed_dict={x: x_value})
+      epsilon = 1e-6
+      y_plus = sess.run(y, feed_dict={x: x_value + epsilon * tangent})
+      y_minus = sess.run(y, feed_dict={x: x_value - epsilon * tangent})
+
+    np.testing.assert_allclose(y_value, sess.run(y, {x: x_value}))
+    np.testing.assert_allclose(z_value, np.sqrt([1.0, 2.0, 3.0]))
+    np.testing.assert_allclose(y_tangent, (y_plus - y_minus) / (2 * epsilon),
+                               rtol=1e-6, atol=1e-9)
+    # The output which does not depend on the input has zero tangent
+    np.testing.assert_array_equal(z_tangent, np.zeros(3))
+
+  def test_jvp_many_outputs(self):
+    s = ops.PlaceholderOp(float)
+    h = ops.SquareOp(s + 1.0) * s
+    y_ops = [ops.SquareOp(h * float(index)) for index in range(1, 5)]
+
+    with Session() as sess:
+      values, tangents = sess.jvp(y_ops, {s: 1.0}, feed_dict={s: 2.0})
+      grads = sess.run(
+          [gradients_impl.gradients(y, [s])[0] for y in y_ops],
+          feed_dict={s: 2.0})
+      # The tangent ops are built once for the same fetches and inputs
+      sess.jvp(y_ops, {s: 1.0}, feed_dict={s: 3.0})
+      self.assertEqual(len(sess._tangents_cache), 1)
+
+    np.testing.assert_allclose(values, [324.0 * i * i for i in range(1, 5)])
+    np.testing.assert_allclose(tangents, grads)
+
+  def test_jvp_broadcast_tangent(self):
+    s = ops.PlaceholderOp(float)
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    y = s * 3.0 + x
+
+    with Session() as sess:
+      y_value, y_tangent = sess.jvp(y, {s: 1.0},
+                                    feed_dict={s: 2.0, x: [1.0, 2.0]})
+    np.testing.assert_array_equal(y_value, [7.0, 8.0])
+    np.testing.assert_array_equal(y_tangent, [3.0, 3.0])
+
+  def test_jvp_with_input_names(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    y = ops.PlaceholderOp(np.float64, shape=[None])
+    c = x * 2.0 + y
+
+    with Session() as sess:
+      _, c_tangent = sess.jvp(c, {y.get_name(): 1.0},
+                              feed_dict={x.get_name(): [1.0], y: [2.0]})
+    np.testing.assert_array_equal(c_tangent, [1.0])
+
+  def test_jvp_with_common_subexpression_elimination(self):
+    x = ops.PlaceholderOp(float)
+    h1 = x * 2.0
+    h2 = x * 2.0
+    y = ops.SquareOp(h2)
+
+    with Session(config=ConfigProto(
+        do_common_subexpression_elimination=True)) as sess:
+      sess.run([y, h1], feed_dict={x: 3.0})
+      # The tangent of the merged op is fed to its replacement
+      _, y_tangent = sess.jvp(y, {h2: 1.0}, feed_dict={x: 3.0})
+    self.assertEqual(y_tangent, 12.0)
+
+  def test_hessian_vector_product(self):
+    w = ops.VariableOp(np.array([1.0, 2.0]))
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    loss = ops.CubicOp(x * w)
+    grad_op, = gradients_impl.gradients(loss, [w])
+
+    x_value = np.array([[1.0, 2.0], [3.0, 4.0]])
+    vector = np.array([1.0, -1.0])
+    with Session() as sess:
+      _, hvp = sess.jvp(grad_op, {w: vector}, feed_dict={x: x_value})
+
+    # The hessian of the sum of (x * w)^3 is diagonal
+    hessian_diagonal = np.sum(6.0 * x_value**3 * w.get_value(), axis=0)
+    np.testing.assert_allclose(hvp, hessian_diagonal * vector)
+
+  def test_unknown_op(self):
+    s = ops.PlaceholderOp(float)
+    y = ops.MultipleNOp(s, s)
+    with self.assertRaises(NotImplementedError):
+      forward_mode.build_tangents([y], [s])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,160 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module contains the compact array-backed form of the graphs."""
+
+import numpy as np
+
+from . import graph
+from . import ops
+
+# The opcodes of the nodes in FrozenGraph
+CONSTANT_OPCODE = 0
+PLACEHOLDER_OPCODE = 1
+ADD_OPCODE = 2
+MINUS_OPCODE = 3
+MULTIPLE_OPCODE = 4
+DIVIDE_OPCODE = 5
+POWER_OPCODE = 6
+# The other ops are kept as objects and computed with compute()
+OP_OPCODE = 7
+
+_OP_TYPE_OPCODE_MAP = {
+    ops.ConstantOp: CONSTANT_OPCODE,
+    ops.PlaceholderOp: PLACEHOLDER_OPCODE,
+    # The variables are frozen to the constants of the current values
+    ops.VariableOp: CONSTANT_OPCODE,
+    ops.AddOp: ADD_OPCODE,
+    ops.MinusOp: MINUS_OPCODE,
+    ops.MultipleOp: MULTIPLE_OPCODE,
+    ops.DivideOp: DIVIDE_OPCODE,
+    ops.PowerOp: POWER_OPCODE,
+    ops.SquareOp: POWER_OPCODE,
+    ops.CubicOp: POWER_OPCODE
+}
+
+
+class FrozenGraph(object):
+  """
+  The immutable struct-of-arrays form of the fetch ops and their ancestors.
+  The nodes are in topological order and the inputs of the node i are
+  input_indexes[input_offsets[i]:input_offsets[i + 1]]. The constant values,
+  the powers, the (name, dtype, shape) of the placeholders and the other ops
+  are stored in attributes and referred by attribute_indexes.
+  """
+
+  def __init__(self, opcodes, input_offsets, input_indexes, attribute_indexes,
+               attributes, fetch_indexes):
+    self._opcodes = opcodes
+    self._input_offsets = input_offsets
+    self._input_indexes = input_indexes
+    self._attribute_indexes = attribute_indexes
+    self._attributes = attributes
+    self._fetch_indexes = fetch_indexes
+
+    # Example: {"Placeholder": 0}
+    self._placeholder_name_index_map = {}
+    for index in np.flatnonzero(opcodes == PLACEHOLDER_OPCODE).tolist():
+      name, _, _ = attributes[attribute_indexes[index]]
+      self._placeholder_name_index_map[name] = index
+
+  def get_node_number(self):
+    return len(self._opcodes)
+
+  def get_opcodes(self):
+    return self._opcodes
+
+  def get_input_offsets(self):
+    return self._input_offsets
+
+  def get_input_indexes(self):
+    return self._input_indexes
+
+  def get_attribute_indexes(self):
+    return self._attribute_indexes
+
+  def get_attributes(self):
+    return self._attributes
+
+  def get_fetch_indexes(self):
+    return self._fetch_indexes
+
+  def get_placeholder_name_index_map(self):
+    return self._placeholder_name_index_map
+
+  def get_nbytes(self):
+    """Return the bytes of the arrays of the nodes."""
+    return (self._opcodes.nbytes + self._input_offsets.nbytes +
+            self._input_indexes.nbytes + self._attribute_indexes.nbytes)
+
+
+def freeze_graph(fetch_ops, graph_instance=None):
+  """
+  Return the FrozenGraph of the fetch ops and their ancestors. The variables
+  are replaced with their current values. Only the graphs of the arithmetic
+  ops can be released, because the ops without opcodes are kept as objects
+  which still refer to their input ops and graph.
+  """
+  if graph_instance is None:
+    graph_instance = graph.get_default_graph()
+
+  fetch_ops = [graph_instance.get_replacement(op) for op in fetch_ops]
+  frozen_ops = graph.get_topological_order(fetch_ops)
+  op_index_map = {op: index for index, op in enumerate(frozen_ops)}
+
+  node_number = len(frozen_ops)
+  opcodes = np.empty(node_number, dtype=np.int8)
+  attribute_indexes = np.full(node_number, -1, dtype=_get_index_dtype(
+      node_number))
+  input_offsets = [0]
+  input_indexes = []
+  attributes = []
+
+  for index, op in enumerate(frozen_ops):
+    opcode = _OP_TYPE_OPCODE_MAP.get(type(op), OP_OPCODE)
+    opcodes[index] = opcode
+
+    if opcode == CONSTANT_OPCODE:
+      attribute_indexes[index] = len(attributes)
+      if isinstance(op, ops.VariableOp) and op.is_in_place():
+        # Freeze the array which may be updated in place later
+        attributes.append(np.array(op.get_value()))
+      else:
+        attributes.append(op.get_value())
+    elif opcode == POWER_OPCODE:
+      attribute_indexes[index] = len(attributes)
+      attributes.append(op.get_power())
+    elif opcode == PLACEHOLDER_OPCODE:
+      attribute_indexes[index] = len(attributes)
+      attributes.append((op.get_name(), op.get_dtype(), op.get_shape()))
+    elif opcode == OP_OPCODE:
+      attribute_indexes[index] = len(attributes)
+      attributes.append(op)
+
+    input_indexes.extend(op_index_map[input_op] for input_op in op.get_inputs())
+    input_offsets.append(len(input_indexes))
+
+  return FrozenGraph(
+      opcodes,
+      np.array(input_offsets, dtype=_get_index_dtype(len(input_indexes))),
+      np.array(input_indexes, dtype=_get_index_dtype(node_number)),
+      attribute_indexes, attributes,
+      [op_index_map[fetch_op] for fetch_op in fetch_ops])
+
+
+def _get_index_dtype(max_index):
+  """Return the smallest integer type of the indexes up to max_index."""
+  if max_index < np.iinfo(np.int32).max:
+    return np.int32
+  else:
+    return np.int64
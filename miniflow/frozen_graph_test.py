@@ -0,0 +1,75 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import executor
+from miniflow import frozen_graph
+from miniflow import graph
+from miniflow import ops
+
+
+class FrozenGraphTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_slots(self):
+    a = ops.ConstantOp(1.0)
+    b = ops.SquareOp(a + 2.0)
+    for op in [a, b, b.get_inputs()[0]]:
+      self.assertFalse(hasattr(op, "__dict__"))
+
+  def test_freeze_graph(self):
+    w = ops.VariableOp(2.0)
+    x = ops.PlaceholderOp(np.float32, name="x")
+    y = ops.SquareOp(w * x + 1.0) / 2.0 - x
+    frozen = frozen_graph.freeze_graph([y, w])
+
+    self.assertEqual(frozen.get_node_number(), 9)
+    self.assertEqual(frozen.get_opcodes().dtype, np.int8)
+    self.assertEqual(frozen.get_input_indexes().dtype, np.int32)
+    self.assertEqual(
+        frozen.get_opcodes().tolist(),
+        [frozen_graph.CONSTANT_OPCODE, frozen_graph.PLACEHOLDER_OPCODE,
+         frozen_graph.MULTIPLE_OPCODE, frozen_graph.CONSTANT_OPCODE,
+         frozen_graph.ADD_OPCODE, frozen_graph.POWER_OPCODE,
+         frozen_graph.CONSTANT_OPCODE, frozen_graph.DIVIDE_OPCODE,
+         frozen_graph.MINUS_OPCODE])
+    self.assertEqual(frozen.get_input_offsets().tolist(),
+                     [0, 0, 0, 2, 2, 4, 5, 5, 7, 9])
+    self.assertEqual(frozen.get_input_indexes().tolist(),
+                     [0, 1, 2, 3, 4, 5, 6, 7, 1])
+    self.assertEqual(frozen.get_fetch_indexes(), [8, 0])
+
+    plan = executor.FrozenExecutionPlan(frozen)
+    self.assertEqual(plan.run({"x": 1.0}), [3.5, 2.0])
+    self.assertEqual(plan.run({x: 3.0}), [21.5, 2.0])
+    self.assertRaises(ValueError, plan.run)
+
+    # The variables are frozen to the values when freezing
+    w.set_value(3.0)
+    self.assertEqual(plan.run({x: 1.0}), [3.5, 2.0])
+
+  def test_run_op_without_opcode(self):
+    x = ops.PlaceholderOp(float)
+    y = ops.AddNOp(x, x * 2.0, 1.0)
+    plan = executor.FrozenExecutionPlan(frozen_graph.freeze_graph([y]))
+    np.testing.assert_array_equal(
+        plan.run({x: np.array([1.0, 2.0])})[0], [4.0, 7.0])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,195 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module fuses the elementwise ops of the execution plans."""
+
+import operator
+
+import numpy as np
+
+from . import ops
+
+# The elementwise ops with the Python operators and NumPy ufuncs
+_ELEMENTWISE_OP_FUNCTION_MAP = {
+    ops.AddOp: (operator.add, np.add),
+    ops.MinusOp: (operator.sub, np.subtract),
+    ops.MultipleOp: (operator.mul, np.multiply),
+    ops.DivideOp: (operator.truediv, np.divide),
+    ops.PowerOp: (pow, np.power),
+    ops.SquareOp: (pow, np.power),
+    ops.CubicOp: (pow, np.power)
+}
+
+
+class FusedElementwiseKernel(object):
+  """
+  The kernel which computes a tree of elementwise ops in one step. The
+  intermediate arrays are owned by the kernel, so the following ops write
+  into them with out= instead of allocating new temporary arrays. The
+  scalar inputs are computed with the Python operators like the ops.
+  """
+
+  def __init__(self, instructions, constants, input_number):
+    # Example: [(operator.add, np.add, [0, 1])], the index refers to the
+    # inputs, the constants and then the results of previous instructions
+    self._instructions = instructions
+    self._constants = constants
+    self._input_number = input_number
+
+  def get_instructions(self):
+    return self._instructions
+
+  def get_input_number(self):
+    return self._input_number
+
+  def compute(self, *input_values, **kwargs):
+    """Compute the tree and write the result into the out array if given."""
+    values = list(input_values) + self._constants
+
+    # The sparse gradients are computed by the operators of IndexedSlices
+    if not any(
+        isinstance(value, np.ndarray) and value.ndim > 0
+        for value in input_values) or any(
+            isinstance(value, ops.IndexedSlices) for value in input_values):
+      for python_function, _, operand_indexes in self._instructions:
+        values.append(
+            python_function(*[values[index] for index in operand_indexes]))
+      return values[-1]
+
+    # The indexes of the arrays which are created by this kernel
+    owned_indexes = set()
+    last_instruction = self._instructions[-1]
+    for instruction in self._instructions:
+      _, ufunc, operand_indexes = instruction
+      operand_values = [values[index] for index in operand_indexes]
+
+      out = None
+      if instruction is last_instruction and "out" in kwargs:
+        out = kwargs["out"]
+      else:
+        for index in operand_indexes:
+          if index in owned_indexes:
+            out = values[index]
+            break
+
+      if out is not None and can_compute_into(out, operand_values):
+        result = ufunc(*operand_values, out=out)
+      else:
+        result = ufunc(*operand_values)
+
+      if isinstance(result, np.ndarray):
+        owned_indexes.add(len(values))
+      values.append(result)
+
+    return values[-1]
+
+
+def can_compute_into(out, operand_values):
+  """Return True if the ufunc result has the shape and dtype of the out."""
+  return out.shape == np.broadcast_shapes(
+      *[np.shape(value) for value in operand_values]) and out.dtype == (
+          np.result_type(*operand_values))
+
+
+def fuse_elementwise_ops(plan_ops, steps, fetch_slots):
+  """
+  Group the maximal trees of elementwise ops into fused steps. The inner ops
+  of one tree are only consumed by the tree and are not fetched, so their
+  values are never read by the other steps. Return the new steps and the map
+  of the root slots to the fused kernels.
+  """
+  consumer_numbers = [0] * len(plan_ops)
+  step_slots = set()
+  for slot, _, input_slots in steps:
+    step_slots.add(slot)
+    for input_slot in input_slots:
+      consumer_numbers[input_slot] += 1
+
+  def is_elementwise(slot):
+    return slot in step_slots and type(
+        plan_ops[slot]) in _ELEMENTWISE_OP_FUNCTION_MAP
+
+  # The inner ops are consumed by exactly one elementwise op
+  inner_slots = set()
+  for slot, _, input_slots in steps:
+    if is_elementwise(slot):
+      for input_slot in input_slots:
+        if is_elementwise(input_slot) and consumer_numbers[input_slot] == 1:
+          inner_slots.add(input_slot)
+  inner_slots.difference_update(fetch_slots)
+
+  slot_input_slots_map = {slot: input_slots for slot, _, input_slots in steps}
+  fused_steps = []
+  slot_kernel_map = {}
+  for slot, compute, input_slots in steps:
+    if slot in inner_slots:
+      continue
+
+    if is_elementwise(slot) and any(input_slot in inner_slots
+                                    for input_slot in input_slots):
+      kernel, leaf_slots = _build_kernel(plan_ops, slot, slot_input_slots_map,
+                                         inner_slots)
+      slot_kernel_map[slot] = kernel
+      fused_steps.append((slot, kernel.compute, leaf_slots))
+    else:
+      fused_steps.append((slot, compute, input_slots))
+
+  return fused_steps, slot_kernel_map
+
+
+def _build_kernel(plan_ops, root_slot, slot_input_slots_map, inner_slots):
+  """Return the kernel of the tree at the root slot and its input slots."""
+  # Visit the tree in post-order without recursion
+  post_order_slots = []
+  stack = [root_slot]
+  while stack:
+    slot = stack.pop()
+    post_order_slots.append(slot)
+    for input_slot in slot_input_slots_map[slot]:
+      if input_slot in inner_slots:
+        stack.append(input_slot)
+  post_order_slots.reverse()
+
+  leaf_slots = []
+  value_index_map = {}
+  for slot in post_order_slots:
+    for input_slot in slot_input_slots_map[slot]:
+      if input_slot not in inner_slots and input_slot not in value_index_map:
+        value_index_map[input_slot] = len(leaf_slots)
+        leaf_slots.append(input_slot)
+
+  constants = []
+  for slot in post_order_slots:
+    if isinstance(plan_ops[slot], ops.PowerOp):
+      constants.append(plan_ops[slot].get_power())
+
+  # The values are the leaves, the powers and then the instruction results
+  instructions = []
+  constant_index = len(leaf_slots)
+  for slot in post_order_slots:
+    op = plan_ops[slot]
+    python_function, ufunc = _ELEMENTWISE_OP_FUNCTION_MAP[type(op)]
+    operand_indexes = [
+        value_index_map[input_slot]
+        for input_slot in slot_input_slots_map[slot]
+    ]
+    if isinstance(op, ops.PowerOp):
+      operand_indexes.append(constant_index)
+      constant_index += 1
+
+    value_index_map[slot] = len(leaf_slots) + len(constants) + len(
+        instructions)
+    instructions.append((python_function, ufunc, operand_indexes))
+
+  return FusedElementwiseKernel(instructions, constants,
+                                len(leaf_slots)), leaf_slots
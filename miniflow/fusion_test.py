@@ -0,0 +1,81 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.config import RunMetadata
+from miniflow.session import Session
+
+
+class FuseElementwiseOpsTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_fuse_elementwise_ops(self):
+    w = ops.VariableOp(2.0)
+    b = ops.VariableOp(1.0)
+    x = ops.PlaceholderOp(np.float64)
+    y = ops.PlaceholderOp(np.float64)
+    loss = ops.SquareOp(y - (w * x + b)) / 2.0
+    feed_dict = {x: np.array([1.0, 2.0, 3.0]), y: np.array([3.0, 7.0, 4.0])}
+
+    run_metadata = RunMetadata()
+    sess = Session(config=ConfigProto(do_elementwise_fusion=True))
+    np.testing.assert_array_equal(
+        sess.run(loss, feed_dict=feed_dict, run_metadata=run_metadata),
+        [0.0, 2.0, 4.5])
+    # The variables, the constant and one fused kernel
+    self.assertEqual(run_metadata.executed_op_number, 4)
+
+    plan = sess._get_plan([loss], feed_dict)
+    self.assertEqual(list(plan.get_slot_kernel_map().keys()),
+                     [plan.get_ops().index(loss)])
+
+    # The scalars are computed with the Python operators
+    self.assertEqual(sess.run(loss, feed_dict={x: 1.0, y: 3.0}), 0.0)
+
+  def test_not_fuse_shared_and_fetched_ops(self):
+    x = ops.PlaceholderOp(np.float64)
+    shared = x * 2.0
+    fetched = shared + 1.0
+    c = ops.SquareOp(fetched) - shared
+    feed_dict = {x: np.array([1.0, 2.0])}
+
+    run_metadata = RunMetadata()
+    sess = Session(config=ConfigProto(do_elementwise_fusion=True))
+    result = sess.run([c, fetched], feed_dict=feed_dict,
+                      run_metadata=run_metadata)
+    np.testing.assert_array_equal(result[0], [7.0, 21.0])
+    np.testing.assert_array_equal(result[1], [3.0, 5.0])
+    # Only the square and the minus ops are fused
+    self.assertEqual(run_metadata.executed_op_number, 5)
+
+  def test_fuse_with_jit(self):
+    x = ops.PlaceholderOp(np.float32, shape=[None])
+    c = ops.CubicOp(x - 1.0) * 2.0 + x
+
+    sess = Session(config=ConfigProto(do_elementwise_fusion=True,
+                                      global_jit_level=1))
+    result = sess.run(c, feed_dict={x: np.array([2.0, 3.0], np.float32)})
+    self.assertEqual(result.dtype, np.float32)
+    np.testing.assert_array_equal(result, [4.0, 19.0])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,145 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module builds the gradient ops of the graphs."""
+
+from . import graph
+from . import ops
+
+# The gradient functions of the op types which are registered below
+_OP_TYPE_GRADIENT_FUNCTION_MAP = {}
+
+
+def register_gradient(op_type):
+  """
+  Return the decorator which registers the gradient function of the op type.
+  The function takes the op and the op of its output gradient, and returns
+  the ops of the gradients of its inputs or None for no gradient.
+  """
+
+  def decorator(gradient_function):
+    _OP_TYPE_GRADIENT_FUNCTION_MAP[op_type] = gradient_function
+    return gradient_function
+
+  return decorator
+
+
+def gradients(loss, variables, reduction="sum"):
+  """
+  Build the ops which compute the gradients of the loss for the variables
+  and return them in the same order, or None if the loss does not depend on
+  the variable. The gradient ops are the normal ops of the graph, so they
+  are pruned, folded, fused and compiled with the forward ops.
+  """
+  if isinstance(variables, ops.Op):
+    variables = [variables]
+
+  activation_ops = graph.get_topological_order([loss])
+  op_index_map = {op: index for index, op in enumerate(activation_ops)}
+  backward_steps = ops._schedule_backward(activation_ops, variables)
+
+  op_grad_ops = [None] * len(activation_ops)
+  op_grad_ops[-1] = ops.LossGradientOp(loss, reduction)
+
+  for index, op, input_indexes, grad_positions in backward_steps:
+    grad_op = op_grad_ops[index]
+    if grad_op is None:
+      continue
+
+    gradient_function = _OP_TYPE_GRADIENT_FUNCTION_MAP.get(
+        type(op), _backward_grad)
+    input_grad_ops = gradient_function(op, grad_op)
+
+    # Accumulate the gradients of the ops with multiple consumers
+    for position in grad_positions:
+      input_grad_op = input_grad_ops[position]
+      input_index = input_indexes[position]
+      if input_grad_op is None:
+        continue
+      elif op_grad_ops[input_index] is None:
+        op_grad_ops[input_index] = input_grad_op
+      else:
+        op_grad_ops[input_index] = ops.AddOp(op_grad_ops[input_index],
+                                             input_grad_op)
+
+  return [
+      op_grad_ops[op_index_map[variable]] if variable in op_index_map else None
+      for variable in variables
+  ]
+
+
+def _backward_grad(op, grad):
+  """Compute the gradients with backward() of the op at run time."""
+  return [
+      ops.BackwardOp(op, position, grad)
+      for position in range(len(op.get_inputs()))
+  ]
+
+
+@register_gradient(ops.AddOp)
+def _add_grad(op, grad):
+  input_op1, input_op2 = op.get_inputs()
+  return [
+      ops.UnbroadcastOp(grad, input_op1),
+      ops.UnbroadcastOp(grad, input_op2)
+  ]
+
+
+@register_gradient(ops.MinusOp)
+def _minus_grad(op, grad):
+  input_op1, input_op2 = op.get_inputs()
+  return [
+      ops.UnbroadcastOp(grad, input_op1),
+      ops.UnbroadcastOp(grad * -1.0, input_op2)
+  ]
+
+
+@register_gradient(ops.MultipleOp)
+def _multiple_grad(op, grad):
+  input_op1, input_op2 = op.get_inputs()
+  return [
+      ops.UnbroadcastOp(grad * input_op2, input_op1),
+      ops.UnbroadcastOp(grad * input_op1, input_op2)
+  ]
+
+
+@register_gradient(ops.DivideOp)
+def _divide_grad(op, grad):
+  input_op1, input_op2 = op.get_inputs()
+  return [
+      ops.UnbroadcastOp(grad / input_op2, input_op1),
+      ops.UnbroadcastOp(grad * input_op1 / (input_op2 * input_op2) * -1.0,
+                        input_op2)
+  ]
+
+
+@register_gradient(ops.PowerOp)
+@register_gradient(ops.SquareOp)
+@register_gradient(ops.CubicOp)
+def _power_grad(op, grad):
+  input_op = op.get_inputs()[0]
+  power = op.get_power()
+  if power == 2:
+    return [grad * 2.0 * input_op]
+  return [grad * float(power) * ops.PowerOp(input_op, power - 1)]
+
+
+@register_gradient(ops.AddNOp)
+def _add_n_grad(op, grad):
+  return [ops.UnbroadcastOp(grad, input_op) for input_op in op.get_inputs()]
+
+
+@register_gradient(ops.EmbeddingLookupOp)
+def _embedding_lookup_grad(op, grad):
+  # The ids have no gradient
+  return [ops.BackwardOp(op, 0, grad), None]
@@ -0,0 +1,101 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import gradients_impl
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.session import Session
+
+
+class GradientsTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_gradients(self):
+    w = ops.VariableOp(np.array([1.0, 2.0]))
+    b = ops.VariableOp(3.0)
+    unused = ops.VariableOp(4.0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    loss = ops.CubicOp(x * w / b - 1.0) + ops.PowerOp(w, 0.5) * b
+
+    grad_ops = gradients_impl.gradients(loss, [w, b, unused], "mean")
+    self.assertIsNone(grad_ops[2])
+
+    x_value = np.array([[1.0, 2.0], [3.0, 4.0]])
+    with Session() as sess:
+      grads = sess.run(grad_ops[:2], feed_dict={x: x_value})
+
+    # The mean of the four losses is compared with the reverse sweep of grad()
+    x.set_value(x_value)
+    np.testing.assert_allclose(grads[0], loss.grad(w.get_name()) / 4.0)
+    np.testing.assert_allclose(grads[1], loss.grad(b.get_name()) / 4.0)
+
+  def test_register_gradient(self):
+    w = ops.VariableOp(3.0)
+    loss = DoubleOp(w) * w
+
+    # The op without gradient function uses backward() at run time
+    grad_op, = gradients_impl.gradients(loss, w)
+    with Session() as sess:
+      self.assertEqual(sess.run(grad_op), 12.0)
+
+    gradients_impl.register_gradient(DoubleOp)(
+        lambda op, grad: [grad * 2.0])
+    try:
+      grad_op, = gradients_impl.gradients(loss, w)
+      self.assertNotIsInstance(grad_op, ops.BackwardOp)
+      with Session() as sess:
+        self.assertEqual(sess.run(grad_op), 12.0)
+    finally:
+      del gradients_impl._OP_TYPE_GRADIENT_FUNCTION_MAP[DoubleOp]
+
+  def test_fold_gradient_ops(self):
+    w = ops.VariableOp(2.0)
+    x = ops.PlaceholderOp(float)
+    loss = w * ops.SquareOp(ops.ConstantOp(3.0)) + x
+    grad_op, = gradients_impl.gradients(loss, [w])
+
+    with Session(config=ConfigProto(do_constant_folding=True)) as sess:
+      self.assertEqual(sess.run(grad_op, feed_dict={x: 1.0}), 9.0)
+      plan = sess._get_plan([grad_op], {x: 1.0})
+    # The gradient ops read the folded square like the forward ops
+    self.assertFalse(
+        any(isinstance(op, ops.PowerOp) for op in plan.get_ops()))
+    self.assertIn(ops.UnbroadcastOp, [type(op) for op in plan.get_ops()])
+
+
+class DoubleOp(ops.Op):
+  def __init__(self, input):
+    super(DoubleOp, self).__init__("Double")
+    self._input = input
+    self._graph = graph.get_default_graph()
+    self._graph.add_to_graph(self)
+
+  def get_inputs(self):
+    return [self._input]
+
+  def compute(self, input_value):
+    return input_value * 2.0
+
+  def backward(self, output_grad, input_value):
+    return [output_grad * 2.0]
+
+
+if __name__ == '__main__':
+  unittest.main()
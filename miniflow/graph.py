@@ -14,6 +14,10 @@
 
 import logging
 
+import numpy as np
+
+from . import parameter_buffer as parameter_buffer_lib
+
 
 class Graph(object):
   def __init__(self):
@@ -21,6 +25,25 @@ class Graph(object):
 
     self._trainable_variables_collection = {}
 
+    # The flat buffer backing the trainable variables if it is created
+    self._parameter_buffer = None
+
+    # The next index to try for the name which has been used
+    self._name_index_map = {}
+
+    # The adjacency index of the inputs and consumers of each op
+    self._op_inputs_map = {}
+    self._op_consumers_map = {}
+
+    # The ops which have been replaced by graph transforms
+    self._replaced_op_map = {}
+
+    # Increase when the graph changes so that compiled plans are invalidated
+    self._version = 0
+
+  def get_version(self):
+    return self._version
+
   def get_name_op_map(self):
     return self._name_op_map
 
@@ -33,20 +56,121 @@ class Graph(object):
           "The key: {} exists in trainable_variables_collection".format(key))
     else:
       self._trainable_variables_collection[key] = value
+      self._version += 1
+
+      # The buffer does not cover the new variable and is not used any more
+      self._parameter_buffer = None
+
+  def get_parameter_buffer(self):
+    return self._parameter_buffer
+
+  def flatten_trainable_variables(self, dtype=np.float64):
+    """
+    Back all the trainable variables with the views of one ParameterBuffer,
+    which is used by the optimizers to update them in one step.
+    """
+    self._parameter_buffer = parameter_buffer_lib.ParameterBuffer(
+        self._trainable_variables_collection, dtype)
+    self._version += 1
+    return self._parameter_buffer
 
   def get_unique_name(self, original_name):
-    unique_name = original_name
-    index = 0
-    while unique_name in self._name_op_map.keys():
-      unique_name = "{}_{}".format(original_name, index)
+    if original_name not in self._name_op_map:
+      return original_name
+
+    # Start from the next index of this name instead of probing from 0
+    index = self._name_index_map.get(original_name, 0)
+    unique_name = "{}_{}".format(original_name, index)
+    while unique_name in self._name_op_map:
       index += 1
+      unique_name = "{}_{}".format(original_name, index)
+    self._name_index_map[original_name] = index + 1
 
     return unique_name
 
+  def get_op_inputs(self, op):
+    return self._op_inputs_map.get(op, [])
+
+  def get_op_consumers(self, op):
+    return self._op_consumers_map.get(op, [])
+
+  def get_unused_ops(self, fetch_ops):
+    """Return the ops in graph which are not required by the fetch ops."""
+    used_ops = set(get_topological_order(fetch_ops))
+    return [op for op in self._name_op_map.values() if op not in used_ops]
+
+  def replace_op(self, op, new_op):
+    """Rewire the consumers of the op to the new op and remove the op."""
+    consumer_ops = []
+    for consumer_op in self.get_op_consumers(op):
+      if consumer_op not in consumer_ops:
+        consumer_ops.append(consumer_op)
+
+    for consumer_op in consumer_ops:
+      self._remove_from_index(consumer_op)
+      consumer_op.replace_input(op, new_op)
+      self._add_to_index(consumer_op)
+
+    self._remove_from_index(op)
+    self._op_consumers_map.pop(op, None)
+
+    if self._name_op_map.get(op.get_name()) is op:
+      del self._name_op_map[op.get_name()]
+    self._replaced_op_map[op] = new_op
+    self._version += 1
+
+  def get_replacement(self, op):
+    """Return the op which replaces the op, or the op itself."""
+    while op in self._replaced_op_map:
+      op = self._replaced_op_map[op]
+    return op
+
   def add_to_graph(self, op):
     unique_name = self.get_unique_name(op.get_name())
     op.set_name(unique_name)
     self._name_op_map[op.get_name()] = op
+    self._add_to_index(op)
+    self._version += 1
+
+  def _add_to_index(self, op):
+    input_ops = list(op.get_inputs())
+    self._op_inputs_map[op] = input_ops
+    for input_op in input_ops:
+      self._op_consumers_map.setdefault(input_op, []).append(op)
+
+  def _remove_from_index(self, op):
+    for input_op in self._op_inputs_map.pop(op, []):
+      self._op_consumers_map[input_op].remove(op)
+
+
+def get_topological_order(fetch_ops):
+  """
+  Return the fetch ops and all of their ancestors in topological order, so
+  that every op comes after the inputs it depends on. It uses an explicit
+  stack instead of recursion so the depth of graph is not limited.
+  """
+  order = []
+  visited = set()
+
+  for fetch_op in fetch_ops:
+    if fetch_op in visited:
+      continue
+    visited.add(fetch_op)
+
+    # Each item is the op and the iterator of its unvisited inputs
+    stack = [(fetch_op, iter(fetch_op.get_inputs()))]
+    while stack:
+      op, input_iterator = stack[-1]
+      for input_op in input_iterator:
+        if input_op not in visited:
+          visited.add(input_op)
+          stack.append((input_op, iter(input_op.get_inputs())))
+          break
+      else:
+        stack.pop()
+        order.append(op)
+
+  return order
 
 
 # TODO: Make global variable for all packages
@@ -14,9 +14,9 @@
 
 import unittest
 
-import graph
-import ops
-from graph import Graph
+from miniflow import graph
+from miniflow import ops
+from miniflow.graph import Graph
 
 
 class GlobalTest(unittest.TestCase):
@@ -51,8 +51,42 @@ class GraphTest(unittest.TestCase):
     op = ops.Op()
     graph.add_to_graph(op)
     name_op_map = graph.get_name_op_map()
-    self.assertEqual(name_op_map.keys()[0], op.get_name())
-    self.assertEqual(name_op_map.values()[0], op)
+    self.assertEqual(list(name_op_map.keys())[0], op.get_name())
+    self.assertEqual(list(name_op_map.values())[0], op)
+
+  def test_get_unique_name(self):
+    graph = Graph()
+    for index in range(3):
+      graph.add_to_graph(ops.Op("Add"))
+    self.assertEqual(
+        sorted(graph.get_name_op_map().keys()), ["Add", "Add_0", "Add_1"])
+
+    # Skip the names which have been used explicitly
+    graph.add_to_graph(ops.Op("Add_2"))
+    op = ops.Op("Add")
+    graph.add_to_graph(op)
+    self.assertEqual(op.get_name(), "Add_3")
+
+  def test_op_consumers(self):
+    graph._default_graph = Graph()
+    a = ops.VariableOp(1.0)
+    b = ops.ConstantOp(2.0)
+    c = a * b
+    d = c + b
+    default_graph = graph.get_default_graph()
+
+    self.assertEqual(default_graph.get_op_inputs(d), [c, b])
+    self.assertEqual(default_graph.get_op_consumers(b), [c, d])
+
+    # Replacing the op rewires its consumers in the index
+    e = ops.ConstantOp(3.0)
+    default_graph.replace_op(b, e)
+    self.assertEqual(default_graph.get_op_inputs(d), [c, e])
+    self.assertEqual(default_graph.get_op_consumers(e), [c, d])
+    self.assertEqual(default_graph.get_op_consumers(b), [])
+    self.assertIs(default_graph.get_replacement(b), e)
+
+    self.assertEqual(default_graph.get_unused_ops([c]), [d])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,112 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module contains the transforms which optimize the graph in place."""
+
+from . import graph
+from . import ops
+
+# The ops which have no side effect and can be evaluated ahead of time
+_PURE_OP_TYPES = (ops.PowerOp, ops.AddOp, ops.MinusOp, ops.MultipleOp,
+                  ops.DivideOp, ops.AddNOp, ops.MultipleNOp, ops.UnbroadcastOp)
+
+# The ops whose output does not depend on the order of inputs
+_COMMUTATIVE_OP_TYPES = (ops.AddOp, ops.MultipleOp, ops.AddNOp,
+                         ops.MultipleNOp)
+
+
+def fold_constants(graph_instance=None, fetch_ops=None):
+  """
+  Replace every op which only depends on ConstantOps with the ConstantOp of
+  its value, so the constant subgraphs are evaluated once instead of in every
+  run and get no gradients. Only the ancestors of the fetch ops are folded if
+  they are given. Return the number of folded ops.
+  """
+  if graph_instance is None:
+    graph_instance = graph.get_default_graph()
+  if fetch_ops is None:
+    fetch_ops = list(graph_instance.get_name_op_map().values())
+
+  op_value_map = {}
+  folded_ops = []
+  for op in graph.get_topological_order(fetch_ops):
+    if isinstance(op, ops.ConstantOp):
+      op_value_map[op] = op.get_value()
+    elif isinstance(op, _PURE_OP_TYPES) and all(
+        input_op in op_value_map for input_op in op.get_inputs()):
+      input_values = [op_value_map[input_op] for input_op in op.get_inputs()]
+      try:
+        op_value_map[op] = op.compute(*input_values)
+      except Exception:
+        # Keep the op so that the error is raised only if it is run
+        continue
+      folded_ops.append(op)
+
+  for op in folded_ops:
+    constant_op = ops.ConstantOp(
+        op_value_map[op], name="ConstantFolding/{}".format(op.get_name()))
+    graph_instance.replace_op(op, constant_op)
+
+  return len(folded_ops)
+
+
+def eliminate_common_subexpressions(graph_instance=None):
+  """
+  Merge the ops which have the same type, attributes and inputs into one
+  canonical op and rewire their consumers to it. Return the number of
+  removed ops.
+  """
+  if graph_instance is None:
+    graph_instance = graph.get_default_graph()
+
+  key_op_map = {}
+  removed_op_number = 0
+  for op in graph.get_topological_order(
+      list(graph_instance.get_name_op_map().values())):
+    key = _get_expression_key(op)
+    if key is None:
+      continue
+
+    if key in key_op_map:
+      graph_instance.replace_op(op, key_op_map[key])
+      removed_op_number += 1
+    else:
+      key_op_map[key] = op
+
+  return removed_op_number
+
+
+def _get_expression_key(op):
+  """Return the hashable key of the expression, or None if not mergeable."""
+  if isinstance(op, ops.ConstantOp):
+    value = op.get_value()
+    try:
+      hash(value)
+    except TypeError:
+      return None
+    # Distinguish the values like 1 and 1.0 which are equal in Python
+    return (ops.ConstantOp, type(value), value)
+
+  elif isinstance(op, _PURE_OP_TYPES):
+    # The inputs have been merged so they are compared by identity
+    input_ids = [id(input_op) for input_op in op.get_inputs()]
+    if isinstance(op, _COMMUTATIVE_OP_TYPES):
+      input_ids.sort()
+
+    if isinstance(op, ops.PowerOp):
+      return (type(op), op.get_power(), tuple(input_ids))
+    else:
+      return (type(op), tuple(input_ids))
+
+  else:
+    return None
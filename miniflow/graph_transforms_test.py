@@ -0,0 +1,102 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from miniflow import graph
+from miniflow import graph_transforms
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.session import Session
+
+
+class FoldConstantsTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_fold_constants(self):
+    x = ops.VariableOp(2.0)
+    coefficient = ops.ConstantOp(2.0) * 3.0 + 1.0
+    y = x * coefficient
+
+    self.assertEqual(graph_transforms.fold_constants(), 2)
+    self.assertIsInstance(y.get_inputs()[1], ops.ConstantOp)
+    self.assertEqual(y.get_inputs()[1].get_value(), 7.0)
+    self.assertEqual(graph_transforms.fold_constants(), 0)
+
+    # The replaced op can still be fetched
+    sess = Session()
+    self.assertEqual(sess.run([y, coefficient]), [14.0, 7.0])
+
+  def test_fold_fetched_constants(self):
+    a = ops.PlaceholderOp(float)
+    unused = ops.ConstantOp(2.0) * 3.0
+    ops.ConstantOp(1) / ops.ConstantOp(0)
+    y = a + ops.ConstantOp(1.0) * 2.0
+
+    # The ops which are not fetched and the failed ops are not folded
+    self.assertEqual(graph_transforms.fold_constants(fetch_ops=[y]), 1)
+    self.assertIs(graph.get_default_graph().get_replacement(unused), unused)
+    self.assertEqual(graph_transforms.fold_constants(), 1)
+
+    sess = Session(config=ConfigProto(do_constant_folding=True))
+    self.assertEqual(sess.run(y + 1.0, feed_dict={a: 1.0}), 4.0)
+
+  def test_gradients_after_folding(self):
+    x = ops.VariableOp(2.0)
+    loss = ops.SquareOp(x * (ops.ConstantOp(1.0) + 2.0))
+
+    graph_transforms.fold_constants()
+    # d(loss)/dx = 2 * 9 * x
+    variablename_grad_map = GradientDescentOptimizer().compute_gradients(loss)
+    self.assertEqual(variablename_grad_map[x.get_name()], 36.0)
+
+
+class EliminateCommonSubexpressionsTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_eliminate_common_subexpressions(self):
+    x = ops.VariableOp(3.0)
+    y = ops.PlaceholderOp(float)
+    first_item = ops.SquareOp(y - x * 2.0)
+    second_item = ops.SquareOp(y - 2.0 * x)
+    loss = first_item + second_item
+
+    # The constants, multiple, minus and square ops are merged
+    self.assertEqual(graph_transforms.eliminate_common_subexpressions(), 4)
+    self.assertIs(loss.get_inputs()[0], loss.get_inputs()[1])
+    self.assertEqual(graph_transforms.eliminate_common_subexpressions(), 0)
+
+    sess = Session()
+    self.assertEqual(
+        sess.run([loss, second_item], feed_dict={y: 10.0}), [32.0, 16.0])
+
+    # d(loss)/dx = 2 * 2 * (y - 2 * x) * -2
+    variablename_grad_map = sess.run(
+        GradientDescentOptimizer().get_gradient_ops(loss, "sum"),
+        feed_dict={y: 10.0})
+    self.assertEqual(variablename_grad_map[x.get_name()], -32.0)
+
+  def test_keep_different_attributes(self):
+    x = ops.VariableOp(3.0)
+    ops.PowerOp(x, 2) + ops.PowerOp(x, 3)
+    ops.ConstantOp(1) + ops.ConstantOp(1.0)
+
+    self.assertEqual(graph_transforms.eliminate_common_subexpressions(), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
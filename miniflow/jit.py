@@ -0,0 +1,166 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module compiles the execution plans to straight-line Python code."""
+
+import numpy as np
+
+from . import executor
+from . import ops
+from . import optimizer
+
+# The ops which are generated as Python binary operators
+_BINARY_OPERATOR_MAP = {
+    ops.AddOp: "+",
+    ops.MinusOp: "-",
+    ops.MultipleOp: "*",
+    ops.DivideOp: "/"
+}
+
+# The ops which are generated as Python power operator
+_POWER_OP_TYPES = (ops.PowerOp, ops.SquareOp, ops.CubicOp)
+
+
+class JitExecutionPlan(executor.ExecutionPlan):
+  """
+  The execution plan which is compiled to one straight-line Python function
+  with compile() and exec(). The intermediate values and gradients are local
+  variables and the fed values are read from feed_dict, so running it has no
+  per-op dispatch or type checks. The ops without generated code fall back
+  to their compute() and backward().
+  """
+
+  def __init__(self, fetch_ops, feed_keys, graph_instance, config=None):
+    super(JitExecutionPlan, self).__init__(fetch_ops, feed_keys,
+                                           graph_instance, config)
+
+    code_generator = _CodeGenerator()
+    self._source = code_generator.generate(
+        self._ops, self._steps, self._feed_key_slot_map, self._fetch_slots,
+        self._slot_kernel_map)
+    self._function = code_generator.compile(self._source)
+
+  def get_source(self):
+    return self._source
+
+  def run(self, feed_dict=None, thread_pool=None):
+    return self._copy_fetched_variables(self._function(feed_dict))
+
+
+class _CodeGenerator(object):
+  def __init__(self):
+    self._lines = []
+    self._namespace = {
+        "_asarray": np.asarray,
+        "_unbroadcast": ops._unbroadcast
+    }
+
+  def _bind(self, prefix, slot, value):
+    """Bind the value to a global name of the generated function."""
+    name = "{}{}".format(prefix, slot)
+    self._namespace[name] = value
+    return name
+
+  def _emit(self, line):
+    self._lines.append("  " + line)
+
+  def generate(self, plan_ops, steps, feed_key_slot_map, fetch_slots,
+               slot_kernel_map):
+    self._lines = ["def _jit_function(feed_dict):"]
+
+    for feed_key, (slot, _) in feed_key_slot_map.items():
+      placeholder_op = plan_ops[slot]
+      key_name = self._bind("k", slot, feed_key)
+      if placeholder_op.get_dtype() is None and (
+          placeholder_op.get_shape() is None):
+        self._emit("v{} = feed_dict[{}]".format(slot, key_name))
+      elif placeholder_op.get_shape() is None:
+        dtype_name = self._bind("d", slot, placeholder_op.get_dtype())
+        self._emit("v{} = _asarray(feed_dict[{}], {})".format(
+            slot, key_name, dtype_name))
+      else:
+        cast_name = self._bind("c", slot, placeholder_op.cast_value)
+        self._emit("v{} = {}(feed_dict[{}])".format(slot, cast_name, key_name))
+
+    for slot, _, input_slots in steps:
+      op = plan_ops[slot]
+      input_names = ["v{}".format(input_slot) for input_slot in input_slots]
+
+      if slot in slot_kernel_map:
+        self._emit("v{} = {}.compute({})".format(
+            slot, self._bind("f", slot, slot_kernel_map[slot]),
+            ", ".join(input_names)))
+      elif type(op) is ops.ConstantOp:
+        self._emit("v{} = {}".format(slot, self._bind("k", slot,
+                                                      op.get_value())))
+      elif type(op) is ops.VariableOp:
+        self._emit("v{} = {}.get_value()".format(slot,
+                                                 self._bind("o", slot, op)))
+      elif type(op) in _BINARY_OPERATOR_MAP:
+        self._emit("v{} = {} {} {}".format(slot, input_names[0],
+                                           _BINARY_OPERATOR_MAP[type(op)],
+                                           input_names[1]))
+      elif type(op) in _POWER_OP_TYPES:
+        power_name = self._bind("p", slot, op.get_power())
+        self._emit("v{} = {} ** {}".format(slot, input_names[0], power_name))
+      elif type(op) is ops.LossGradientOp:
+        # The initial gradient of the scalar loss is always one
+        self._emit("v{0} = {1}({2}) if getattr({2}, 'ndim', 0) else 1".format(
+            slot, self._bind("s", slot, op.compute), input_names[0]))
+      elif type(op) is ops.UnbroadcastOp:
+        # Only sum over the broadcast axes if the shapes are different
+        self._emit("v{0} = {1} if getattr({1}, 'shape', ()) == getattr("
+                   "{2}, 'shape', ()) else _unbroadcast({1}, {2})".format(
+                       slot, input_names[0], input_names[1]))
+      elif type(op) is optimizer.OptimizerMinimizeOp:
+        self._generate_minimize(slot, op, input_names)
+      else:
+        self._emit("v{} = {}.compute({})".format(
+            slot, self._bind("o", slot, op), ", ".join(input_names)))
+
+    self._emit("return [{}]".format(", ".join(
+        "v{}".format(fetch_slot) for fetch_slot in fetch_slots)))
+    return "\n".join(self._lines) + "\n"
+
+  def compile(self, source):
+    code = compile(source, "<miniflow-jit>", "exec")
+    exec(code, self._namespace)
+    return self._namespace["_jit_function"]
+
+  def _generate_minimize(self, slot, minimize_op, grad_names):
+    """
+    Generate the updates of GradientDescentOptimizer.apply_gradients(), or
+    the call of apply_gradients() for the other optimizers.
+    """
+    optimizer_instance = minimize_op.get_optimizer()
+    optimizer_name = self._bind("o", slot, optimizer_instance)
+    variable_names = minimize_op.get_variable_names()
+    variablename_variable_map = optimizer_instance.get_graph(
+    ).get_trainable_variables_collection()
+
+    if type(optimizer_instance) is not optimizer.GradientDescentOptimizer or (
+        optimizer_instance.get_graph().get_parameter_buffer() is not None
+    ) or list(variablename_variable_map.keys()) != variable_names:
+      # The other optimizers and the flat buffer update all the variables in
+      # vectorized steps
+      self._emit("v{} = {}.compute({})".format(
+          slot, self._bind("m", slot, minimize_op), ", ".join(grad_names)))
+      return
+
+    self._emit("r = {}.get_learning_rate()".format(optimizer_name))
+    for index, (variable_name, grad_name) in enumerate(
+        zip(variable_names, grad_names)):
+      variable_op_name = self._bind("w{}_".format(slot), index,
+                                    variablename_variable_map[variable_name])
+      self._emit("{}.assign_sub(r * {})".format(variable_op_name, grad_name))
+    self._emit("v{} = None".format(slot))
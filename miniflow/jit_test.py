@@ -0,0 +1,86 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import jit
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.session import Session
+
+
+class JitExecutionPlanTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_run(self):
+    a = ops.PlaceholderOp(np.float32)
+    b = ops.VariableOp(3.0)
+    c = ops.SquareOp(a * b + 1.0) / 2.0 - ops.PowerOp(b, 3)
+    # The op without generated code falls back to compute()
+    d = ops.AddNOp(a, b, 1.0)
+
+    sess = Session(config=ConfigProto(global_jit_level=1))
+    self.assertEqual(sess.run([c, d], feed_dict={a: 1.0}), [-19.0, 5.0])
+    plan = sess._get_plan([c, d], {a: 1.0})
+    self.assertIsInstance(plan, jit.JitExecutionPlan)
+    self.assertIn(".compute(", plan.get_source())
+
+  def test_run_unfed_placeholder(self):
+    a = ops.PlaceholderOp(float)
+    sess = Session(config=ConfigProto(global_jit_level=1))
+    self.assertRaises(ValueError, sess.run, a + 1.0)
+
+  def test_minimize(self):
+    features = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    labels = np.array([[3.0, 5.0], [7.0, 9.0], [11.0, 13.0]])
+
+    final_values = []
+    for global_jit_level in [0, 1]:
+      graph._default_graph = graph.Graph()
+      weights = ops.VariableOp(np.zeros(2))
+      bias = ops.VariableOp(0.0)
+      x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      loss = ops.SquareOp(y - (x * weights + bias))
+      train_op = GradientDescentOptimizer(0.01).minimize(loss)
+
+      sess = Session(config=ConfigProto(global_jit_level=global_jit_level))
+      for _ in range(10):
+        sess.run(train_op, feed_dict={x: features, y: labels})
+      final_values.append(
+          sess.run([loss, weights, bias], feed_dict={x: features,
+                                                     y: labels}))
+
+    np.testing.assert_allclose(final_values[0][0], final_values[1][0])
+    np.testing.assert_allclose(final_values[0][1], final_values[1][1])
+    self.assertAlmostEqual(final_values[0][2], final_values[1][2])
+
+  def test_gradients_of_shared_op(self):
+    x = ops.VariableOp(2.0)
+    y = ops.SquareOp(x)
+    loss = y * y + y
+    grad_ops = GradientDescentOptimizer().get_gradient_ops(loss)
+
+    sess = Session(config=ConfigProto(global_jit_level=1))
+    # d(loss)/dx = (2 * x^2 + 1) * 2 * x
+    self.assertEqual(sess.run(grad_ops), {x.get_name(): 36.0})
+
+
+if __name__ == '__main__':
+  unittest.main()
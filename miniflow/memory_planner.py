@@ -0,0 +1,171 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module plans the buffers of the intermediate values of the plans."""
+
+import threading
+
+import numpy as np
+
+from . import fusion
+from . import ops
+
+# The ops which only read their inputs and return new values
+_READING_OP_TYPES = (ops.LossGradientOp,)
+
+
+class MemoryPlanner(object):
+  """
+  The static memory planner of one execution plan. The first run with new
+  feed shapes records the shapes of the intermediate arrays. Then the
+  liveness of each value over the execution order is used to share a small
+  set of buffers, and the following runs with the same feed shapes write the
+  elementwise results into these buffers with out=.
+
+  Only the values which are produced by the elementwise ops or the fused
+  kernels and only read by them or the gradient ops are planned. The fetched
+  values are never planned because they are returned to the user. The
+  buffers are shared by the runs, so the concurrent runs are serialized.
+  """
+
+  def __init__(self, plan_ops, steps, fed_slots, fetch_slots,
+               slot_kernel_map):
+    self._steps = steps
+    self._fed_slots = sorted(fed_slots)
+
+    # The functions which write the result of the step into the buffer
+    self._step_out_computes = []
+    for slot, _, _ in steps:
+      self._step_out_computes.append(
+          _get_out_compute(plan_ops[slot], slot_kernel_map.get(slot)))
+
+    # The index of the last step which reads the slot
+    self._slot_last_use_map = {}
+    consumer_plannable_map = {}
+    for index, (slot, _, input_slots) in enumerate(steps):
+      is_plannable_consumer = self._step_out_computes[index] is not None or (
+          type(plan_ops[slot]) in _READING_OP_TYPES)
+      for position, input_slot in enumerate(input_slots):
+        self._slot_last_use_map[input_slot] = index
+        # The gradient ops only read the shape of the activation
+        is_plannable_input = is_plannable_consumer or (
+            type(plan_ops[slot]) is ops.UnbroadcastOp and position == 1)
+        consumer_plannable_map[input_slot] = consumer_plannable_map.get(
+            input_slot, True) and is_plannable_input
+
+    self._planned_slots = set(
+        slot for index, (slot, _, _) in enumerate(steps)
+        if self._step_out_computes[index] is not None and
+        consumer_plannable_map.get(slot, False))
+    self._planned_slots.difference_update(fetch_slots)
+
+    # The feed signature and the buffer of each step for the last run
+    self._feed_signature = None
+    self._step_buffers = None
+    self._arena_size = 0
+    self._lock = threading.Lock()
+
+  def get_arena_size(self):
+    """Return the bytes of all the buffers of the arena."""
+    return self._arena_size
+
+  def run_steps(self, values):
+    """Run the steps with the fed values in place."""
+    with self._lock:
+      self._run_steps(values)
+
+  def _run_steps(self, values):
+    feed_signature = tuple(
+        (np.shape(values[slot]), getattr(values[slot], "dtype", None))
+        for slot in self._fed_slots)
+
+    if feed_signature != self._feed_signature or self._step_buffers is None:
+      for slot, compute, input_slots in self._steps:
+        values[slot] = compute(*[values[index] for index in input_slots])
+      self._plan_buffers(values)
+      self._feed_signature = feed_signature
+      return
+
+    for (slot, compute, input_slots), out_compute, buffer in zip(
+        self._steps, self._step_out_computes, self._step_buffers):
+      input_values = [values[index] for index in input_slots]
+      if buffer is None:
+        values[slot] = compute(*input_values)
+      else:
+        values[slot] = out_compute(buffer, *input_values)
+
+  def _plan_buffers(self, values):
+    """Assign the buffers to the planned values by their liveness."""
+    free_buffers = []
+    slot_buffer_map = {}
+    self._step_buffers = []
+    self._arena_size = 0
+
+    for index, (slot, _, input_slots) in enumerate(self._steps):
+      value = values[slot]
+      step_buffer = None
+
+      if slot in self._planned_slots and isinstance(
+          value, np.ndarray) and value.ndim > 0:
+        # Reuse the smallest free buffer which is large enough
+        fitting_indexes = [
+            buffer_index for buffer_index, free_buffer in enumerate(
+                free_buffers) if len(free_buffer) >= value.nbytes
+        ]
+        if fitting_indexes:
+          buffer = free_buffers.pop(
+              min(fitting_indexes, key=lambda i: len(free_buffers[i])))
+        else:
+          buffer = np.empty(value.nbytes, dtype=np.uint8)
+          self._arena_size += value.nbytes
+
+        slot_buffer_map[slot] = buffer
+        step_buffer = buffer[:value.nbytes].view(value.dtype).reshape(
+            value.shape)
+
+      self._step_buffers.append(step_buffer)
+
+      # Release the buffers after the output of this step is assigned
+      for input_slot in set(input_slots):
+        if input_slot in slot_buffer_map and self._slot_last_use_map[
+            input_slot] == index:
+          free_buffers.append(slot_buffer_map.pop(input_slot))
+
+
+def _get_out_compute(op, kernel):
+  """Return the function which computes the op into the buffer, or None."""
+  if kernel is not None:
+
+    def kernel_out_compute(out, *input_values):
+      return kernel.compute(*input_values, out=out)
+
+    return kernel_out_compute
+
+  if type(op) not in fusion._ELEMENTWISE_OP_FUNCTION_MAP:
+    return None
+
+  _, ufunc = fusion._ELEMENTWISE_OP_FUNCTION_MAP[type(op)]
+  constants = [op.get_power()] if isinstance(op, ops.PowerOp) else []
+
+  def out_compute(out, *input_values):
+    operand_values = list(input_values) + constants
+    if not any(
+        isinstance(value, ops.IndexedSlices)
+        for value in input_values) and fusion.can_compute_into(
+            out, operand_values):
+      return ufunc(*operand_values, out=out)
+    else:
+      # The shapes of the variables may be changed since the planning
+      return op.compute(*input_values)
+
+  return out_compute
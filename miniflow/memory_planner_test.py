@@ -0,0 +1,127 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.config import RunMetadata
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.session import Session
+
+
+class MemoryPlannerTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_reuse_buffers(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    a = x * 2.0
+    b = a + 1.0
+    c = b * b
+    d = c - x
+
+    sess = Session(config=ConfigProto(do_memory_planning=True))
+    run_metadata = RunMetadata()
+    for value in [1.0, 2.0, 3.0]:
+      feed_dict = {x: np.full(1000, value)}
+      result = sess.run(d, feed_dict=feed_dict, run_metadata=run_metadata)
+      np.testing.assert_array_equal(result,
+                                    np.full(1000, (2 * value + 1)**2 - value))
+
+    # The buffer of a is reused by c after the last use of a
+    self.assertEqual(run_metadata.peak_arena_size, 2 * 8000)
+
+    # The fetched values are not overwritten by the following runs
+    first_result = sess.run(d, feed_dict={x: np.ones(1000)})
+    sess.run(d, feed_dict={x: np.zeros(1000)})
+    np.testing.assert_array_equal(first_result, np.full(1000, 8.0))
+
+  def test_reuse_buffers_with_fusion(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    c = x * 2.0 + 1.0
+    d = c * c - x
+
+    sess = Session(config=ConfigProto(do_memory_planning=True,
+                                      do_elementwise_fusion=True))
+    run_metadata = RunMetadata()
+    for value in [1.0, 2.0, 3.0]:
+      result = sess.run(d, feed_dict={x: np.full(100, value)},
+                        run_metadata=run_metadata)
+      np.testing.assert_array_equal(result,
+                                    np.full(100, (2 * value + 1)**2 - value))
+    # The fused kernel of c writes into the only buffer
+    self.assertEqual(run_metadata.peak_arena_size, 800)
+
+  def test_replan_with_new_feed_shapes(self):
+    x = ops.PlaceholderOp(np.float32, shape=[None])
+    c = (x + 1.0) * 2.0 - x
+
+    sess = Session(config=ConfigProto(do_memory_planning=True))
+    run_metadata = RunMetadata()
+    for size in [10, 10, 20, 20, 10]:
+      result = sess.run(c, feed_dict={x: np.ones(size, np.float32)},
+                        run_metadata=run_metadata)
+      self.assertEqual(result.dtype, np.float32)
+      np.testing.assert_array_equal(result, np.full(size, 3.0))
+    self.assertEqual(run_metadata.peak_arena_size, 2 * 10 * 4)
+
+  def test_reuse_buffers_of_mixed_sizes(self):
+    a = ops.PlaceholderOp(np.float64, shape=[None])
+    b = ops.PlaceholderOp(np.float64, shape=[None, None])
+    c = ((b * 2.0) * (a * 3.0)) * (a * 4.0)
+
+    sess = Session(config=ConfigProto(do_memory_planning=True))
+    run_metadata = RunMetadata()
+    for _ in range(2):
+      result = sess.run(c, feed_dict={a: np.ones(3), b: np.ones((4, 3))},
+                        run_metadata=run_metadata)
+      np.testing.assert_array_equal(result, np.full((4, 3), 24.0))
+    # The buffers of b * 2.0 and a * 3.0 are freed together, then a * 4.0
+    # takes the small one and the output takes the large one
+    self.assertEqual(run_metadata.peak_arena_size, 8 * (12 + 3 + 12))
+
+  def test_minimize(self):
+    features = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    labels = np.array([[3.0, 5.0], [7.0, 9.0], [11.0, 13.0]])
+
+    final_values = []
+    for do_memory_planning in [False, True]:
+      graph._default_graph = graph.Graph()
+      weights = ops.VariableOp(np.zeros(2))
+      bias = ops.VariableOp(0.0)
+      x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      loss = ops.SquareOp(y - (x * weights + bias))
+      train_op = GradientDescentOptimizer(0.01).minimize(loss)
+
+      sess = Session(config=ConfigProto(do_memory_planning=do_memory_planning))
+      run_metadata = RunMetadata()
+      for _ in range(10):
+        sess.run(train_op, feed_dict={x: features, y: labels},
+                 run_metadata=run_metadata)
+      final_values.append([weights.get_value(), bias.get_value()])
+
+    # The activations of x * weights, the add, the minus and the loss which
+    # are read by the gradient ops, and one buffer shared by the gradients
+    self.assertEqual(run_metadata.peak_arena_size, 5 * features.nbytes)
+    np.testing.assert_allclose(final_values[0][0], final_values[1][0])
+    self.assertAlmostEqual(final_values[0][1], final_values[1][1])
+
+
+if __name__ == '__main__':
+  unittest.main()
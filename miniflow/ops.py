@@ -13,12 +13,13 @@
 # limitations under the License.
 """This module contains all the basic operations."""
 
-from abc import ABCMeta, abstractmethod
 import logging
 import math
 import os
 import sys
 
+import numpy as np
+
 from . import graph
 # import graph
 
@@ -32,6 +33,8 @@ if "ENABLE_SWIG_OP" in os.environ:
 class Op(object):
   """The basic class for all operation."""
 
+  __slots__ = ("name", "_graph")
+
   def __init__(self, name="Op"):
     # Be compatiable with TensorFlow to remove underline
     self.name = name
@@ -42,12 +45,50 @@ class Op(object):
   def set_name(self, name):
     self.name = name
 
-  @abstractmethod
   def forward(self):
-    # TODO: No need to implement in abstract method
+    """Evaluate this op and its ancestors without Python recursion."""
+    activation_ops = graph.get_topological_order([self])
+    return _evaluate(activation_ops)[-1]
+
+  def grad(self, partial_derivative_opname=None):
+    """
+    Compute the gradient for the VariableOp of the name, or the sum of the
+    gradients for all VariableOps if the name is None, with one reverse sweep.
+    """
+    activation_ops = graph.get_topological_order([self])
+    activations = _evaluate(activation_ops)
+
+    variable_indexes = [
+        index for index, op in enumerate(activation_ops)
+        if isinstance(op, VariableOp) and (partial_derivative_opname is None or
+                                           op.get_name() ==
+                                           partial_derivative_opname)
+    ]
+    backward_steps = _schedule_backward(
+        activation_ops, [activation_ops[index] for index in variable_indexes])
+    op_grads = _run_backward(backward_steps, activations,
+                             _ones_like(activations[-1]))
+
+    grad = 0
+    for index in variable_indexes:
+      if op_grads[index] is not None:
+        grad = grad + op_grads[index]
+    return grad
+
+  def get_inputs(self):
+    """Return the input ops which should be evaluated before this op."""
+    return []
+
+  def replace_input(self, input_op, new_input_op):
+    """Replace the input op with the new op when rewriting the graph."""
     raise NotImplementedError
 
-  def grad(self):
+  def compute(self, *input_values):
+    """Compute the output of this op from the evaluated input values."""
+    raise NotImplementedError
+
+  def backward(self, output_grad, *input_values):
+    """Return the gradients of the inputs from the gradient of the output."""
     raise NotImplementedError
 
   def __add__(self, other):
@@ -82,11 +123,16 @@ class Op(object):
 
 
 class PlaceholderOp(Op):
-  """The placeholer operation which value is set when Session.run()"""
+  """
+  The placeholer operation which value is set when Session.run(). The fed
+  value is converted to the NumPy array of the dtype and the shape is checked
+  if they are specified. The dimension of None in shape matches any size.
+  """
+
+  __slots__ = ("_dtype", "_shape", "_value")
 
   def __init__(self, dtype=None, shape=None, name="Placeholder"):
     super(PlaceholderOp, self).__init__(name)
-    # TODO: Use dtype and shape
     self._dtype = dtype
     self._shape = shape
 
@@ -97,15 +143,31 @@ class PlaceholderOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
+  def get_dtype(self):
+    return self._dtype
+
+  def get_shape(self):
+    return self._shape
+
   def set_value(self, value):
-    self._value = value
+    self._value = self.cast_value(value)
 
   def get_value(self):
     return self._value
 
+  def cast_value(self, value):
+    """Convert the value to the dtype and check the shape of placeholder."""
+    return _cast_value(value, self._dtype, self._shape, self.name)
+
   def forward(self):
     return self._value
 
+  def compute(self):
+    if self._value is None:
+      raise ValueError("You must feed a value for placeholder {}".format(
+          self.name))
+    return self._value
+
   def grad(self, partial_derivative_opname=None):
     return 0
 
@@ -113,6 +175,8 @@ class PlaceholderOp(Op):
 class ConstantOp(Op):
   """The constant operation which contains one initialized value."""
 
+  __slots__ = ("_value",)
+
   def __init__(self, value, name="Constant"):
     super(ConstantOp, self).__init__(name)
     self._value = value
@@ -126,6 +190,12 @@ class ConstantOp(Op):
     return self._value
 
   def forward(self):
+    # The array which is updated in place is copied for the caller
+    if self._is_in_place:
+      return np.array(self._value)
+    return self._value
+
+  def compute(self):
     return self._value
 
   def grad(self, partial_derivative_opname=None):
@@ -139,11 +209,16 @@ class VariableOp(Op):
   models.
   """
 
+  __slots__ = ("_value", "_is_trainable", "_is_in_place")
+
   def __init__(self, value, is_trainable=True, name="Variable"):
     super(VariableOp, self).__init__(name)
     self._value = value
     self._is_trainable = is_trainable
 
+    # Update the array of the value in place instead of replacing it
+    self._is_in_place = False
+
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
@@ -155,8 +230,39 @@ class VariableOp(Op):
 
   def set_value(self, value):
     self._value = value
+    self._is_in_place = False
+
+  def is_in_place(self):
+    return self._is_in_place
+
+  def set_in_place_value(self, array):
+    """
+    Use the array as the value and update it in place, which may be the
+    view of the memory shared with other variables or processes.
+    """
+    self._value = array
+    self._is_in_place = True
+
+  def assign_sub(self, delta):
+    """Subtract the delta, which may be IndexedSlices, from the value."""
+    if isinstance(delta, IndexedSlices):
+      if not self._is_in_place:
+        # Copy the value once so that the rows are updated in place later
+        self._value = np.array(self._value)
+        self._is_in_place = True
+      np.subtract.at(self._value, delta.get_indices(), delta.get_values())
+    elif self._is_in_place:
+      np.subtract(self._value, delta, out=self._value)
+    else:
+      self._value = self._value - delta
 
   def forward(self):
+    # The array which is updated in place is copied for the caller
+    if self._is_in_place:
+      return np.array(self._value)
+    return self._value
+
+  def compute(self):
     return self._value
 
   def grad(self, partial_derivative_opname=None):
@@ -173,6 +279,8 @@ class VariableOp(Op):
 
 
 class PowerOp(Op):
+  __slots__ = ("_op", "_power")
+
   def __init__(self, input, power, name="Power"):
     super(PowerOp, self).__init__(name)
 
@@ -186,26 +294,30 @@ class PowerOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    result = pow(self._op.forward(), self._power)
-    return result
+  def get_power(self):
+    return self._power
 
-  def grad(self, partial_derivative_opname=None):
-    if isinstance(self._op, PlaceholderOp) or isinstance(self._op, ConstantOp):
-      # op is the constant
-      grad = 0
-    elif isinstance(self._op, VariableOp):
-      # op is the variable
-      grad = self._power * pow(self._op.forward(), self._power - 1)
-    else:
-      # op is other complex operation and use chain rule
-      grad = self._power * pow(self._op.forward(), self._power - 1
-                               ) * self._op.grad(partial_derivative_opname)
+  def get_inputs(self):
+    return [self._op]
 
-    return grad
+  def replace_input(self, input_op, new_input_op):
+    if self._op is input_op:
+      self._op = new_input_op
+
+  def compute(self, input_value):
+    return pow(input_value, self._power)
+
+  def backward(self, output_grad, input_value):
+    return [
+        _unbroadcast(output_grad * self._power * pow(input_value,
+                                                     self._power - 1),
+                     input_value)
+    ]
 
 
 class SquareOp(PowerOp):
+  __slots__ = ()
+
   def __init__(self, input, name="Square"):
     super(SquareOp, self).__init__(input, 2, name)
 
@@ -213,6 +325,8 @@ class SquareOp(PowerOp):
 class SquareOpOld(Op):
   # TODO: Deprecated op
 
+  __slots__ = ("op", "graph")
+
   def __init__(self, input, name="Square"):
     if not isinstance(input, Op):
       self.op = ConstantOp(input)
@@ -231,6 +345,9 @@ class SquareOpOld(Op):
       result = pow(self.op.forward(), 2)
     return result
 
+  def compute(self):
+    return self.forward()
+
   def grad(self, partial_derivative_opname=None):
     if isinstance(self.op, PlaceholderOp) or isinstance(self.op, ConstantOp):
       # op is the constant
@@ -249,6 +366,8 @@ class SquareOpOld(Op):
 
 
 class CubicOp(PowerOp):
+  __slots__ = ()
+
   def __init__(self, input, name="Cubic"):
     super(CubicOp, self).__init__(input, 3, name)
 
@@ -256,6 +375,8 @@ class CubicOp(PowerOp):
 class CubicOpOld(Op):
   # TODO: Deprecated op
 
+  __slots__ = ("op", "graph")
+
   def __init__(self, input, name="Cubic"):
     if not isinstance(input, Op):
       self.op = ConstantOp(input)
@@ -274,6 +395,9 @@ class CubicOpOld(Op):
       result = math.pow(self.op.forward(), 3)
     return result
 
+  def compute(self):
+    return self.forward()
+
   def grad(self, partial_derivative_opname=None):
     if isinstance(self.op, PlaceholderOp) or isinstance(self.op, ConstantOp):
       # op is the constant
@@ -305,6 +429,8 @@ class AddOp(Op):
   primitive, ConstantOp, PlaceholerOp, VariableOp or other ops.
   """
 
+  __slots__ = ("_op1", "_op2")
+
   def __init__(self, input1, input2, name="Add"):
     super(AddOp, self).__init__(name)
 
@@ -321,14 +447,23 @@ class AddOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    result = self._op1.forward() + self._op2.forward()
-    return result
+  def get_inputs(self):
+    return [self._op1, self._op2]
 
-  def grad(self, partial_derivative_opname=None):
-    result = self._op1.grad(partial_derivative_opname) + self._op2.grad(
-        partial_derivative_opname)
-    return result
+  def replace_input(self, input_op, new_input_op):
+    if self._op1 is input_op:
+      self._op1 = new_input_op
+    if self._op2 is input_op:
+      self._op2 = new_input_op
+
+  def compute(self, input_value1, input_value2):
+    return input_value1 + input_value2
+
+  def backward(self, output_grad, input_value1, input_value2):
+    return [
+        _unbroadcast(output_grad, input_value1),
+        _unbroadcast(output_grad, input_value2)
+    ]
 
 
 class MinusOp(Op):
@@ -336,6 +471,8 @@ class MinusOp(Op):
   The minus operation.
   """
 
+  __slots__ = ("_op1", "_op2")
+
   def __init__(self, input1, input2, name="Minus"):
     super(MinusOp, self).__init__(name)
 
@@ -352,17 +489,28 @@ class MinusOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    result = self._op1.forward() - self._op2.forward()
-    return result
+  def get_inputs(self):
+    return [self._op1, self._op2]
 
-  def grad(self, partial_derivative_opname=None):
-    result = self._op1.grad(partial_derivative_opname) - self._op2.grad(
-        partial_derivative_opname)
-    return result
+  def replace_input(self, input_op, new_input_op):
+    if self._op1 is input_op:
+      self._op1 = new_input_op
+    if self._op2 is input_op:
+      self._op2 = new_input_op
+
+  def compute(self, input_value1, input_value2):
+    return input_value1 - input_value2
+
+  def backward(self, output_grad, input_value1, input_value2):
+    return [
+        _unbroadcast(output_grad, input_value1),
+        _unbroadcast(-output_grad, input_value2)
+    ]
 
 
 class AddNOp(Op):
+  __slots__ = ("ops", "graph")
+
   def __init__(self, *inputs):
     # TODO: Deprecated op
     # TODO: Support user defined name in the parameter
@@ -377,20 +525,27 @@ class AddNOp(Op):
     self.graph = graph.get_default_graph()
     self.graph.add_to_graph(self)
 
-  def forward(self):
-    result = 0
-    for op in self.ops:
-      result += op.forward()
-    return result
+  def get_inputs(self):
+    return self.ops
 
-  def grad(self, partial_derivative_opname=None):
+  def replace_input(self, input_op, new_input_op):
+    self.ops = [new_input_op if op is input_op else op for op in self.ops]
+
+  def compute(self, *input_values):
     result = 0
-    for op in self.ops:
-      result += op.grad(partial_derivative_opname)
+    for input_value in input_values:
+      result += input_value
     return result
 
+  def backward(self, output_grad, *input_values):
+    return [
+        _unbroadcast(output_grad, input_value) for input_value in input_values
+    ]
+
 
 class MultipleOp(Op):
+  __slots__ = ("_op1", "_op2")
+
   def __init__(self, input1, input2, name="Multiple"):
     super(MultipleOp, self).__init__(name)
 
@@ -407,55 +562,31 @@ class MultipleOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    result = self._op1.forward() * self._op2.forward()
-    return result
-
-  def grad(self, partial_derivative_opname=None):
-    op1_value = self._op1.forward()
-    op2_value = self._op2.forward()
-
-    if isinstance(self._op1, PlaceholderOp) or isinstance(
-        self._op1, ConstantOp):
-      # op1 is the coefficient of this formula
-      op1_grad = self._op1.forward()
-
-      if isinstance(self._op2, PlaceholderOp) or isinstance(
-          self._op2, ConstantOp):
-        # two elements are both constant values
-        op2_grad = 0
-      else:
-        # op2 may has VariableOp
-        op2_grad = self._op2.grad(partial_derivative_opname)
-
-      result = op1_grad * op2_grad
-    elif isinstance(self._op2, PlaceholderOp) or isinstance(
-        self._op2, ConstantOp):
-      # op2 is the coefficient of this formula
-      op2_grad = self._op2.forward()
+  def get_inputs(self):
+    return [self._op1, self._op2]
 
-      # op1 may has VariableOp
-      op1_grad = self._op1.grad(partial_derivative_opname)
+  def replace_input(self, input_op, new_input_op):
+    if self._op1 is input_op:
+      self._op1 = new_input_op
+    if self._op2 is input_op:
+      self._op2 = new_input_op
 
-      result = op1_grad * op2_grad
-    else:
-      # op1 and op2 may has VariableOp
-      # Refer to https://en.wikipedia.org/wiki/Product_rule
-      #logging.error(
-      #    "Not support complex formula which has multiple VariableOp")
-      #raise NotImplementedError
-
-      op1_grad = self._op1.grad(partial_derivative_opname)
-      op2_grad = self._op2.grad(partial_derivative_opname)
-      result = op1_grad * op2_value + op1_value * op2_grad
+  def compute(self, input_value1, input_value2):
+    return input_value1 * input_value2
 
-    return result
+  def backward(self, output_grad, input_value1, input_value2):
+    return [
+        _unbroadcast(output_grad * input_value2, input_value1),
+        _unbroadcast(output_grad * input_value1, input_value2)
+    ]
 
 
 class MultipleNOp(Op):
   # TODO: Deprecated op
   """The multiple operation for n inputs."""
 
+  __slots__ = ("ops", "graph")
+
   def __init__(self, *inputs):
     self.name = "MultipleN"
 
@@ -468,21 +599,32 @@ class MultipleNOp(Op):
     self.graph = graph.get_default_graph()
     self.graph.add_to_graph(self)
 
-  def forward(self):
-    result = 1
-    for op in self.ops:
-      result *= op.forward()
-    return result
+  def get_inputs(self):
+    return self.ops
 
-  def grad(self, partial_derivative_opname=None):
-    # TODO: Check the type of op to compute gradients
+  def replace_input(self, input_op, new_input_op):
+    self.ops = [new_input_op if op is input_op else op for op in self.ops]
+
+  def compute(self, *input_values):
     result = 1
-    for op in self.ops:
-      result *= op.grad(partial_derivative_opname)
+    for input_value in input_values:
+      result *= input_value
     return result
 
+  def backward(self, output_grad, *input_values):
+    input_grads = []
+    for index in range(len(input_values)):
+      input_grad = output_grad
+      for other_index, input_value in enumerate(input_values):
+        if other_index != index:
+          input_grad = input_grad * input_value
+      input_grads.append(_unbroadcast(input_grad, input_values[index]))
+    return input_grads
+
 
 class DivideOp(Op):
+  __slots__ = ("_op1", "_op2")
+
   def __init__(self, input1, input2, name="Divide"):
     super(DivideOp, self).__init__(name)
 
@@ -499,62 +641,232 @@ class DivideOp(Op):
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    result = self._op1.forward() / self._op2.forward()
-    return result
+  def get_inputs(self):
+    return [self._op1, self._op2]
 
-  def grad(self, partial_derivative_opname=None):
-    op1_value = self._op1.forward()
-    op2_value = self._op2.forward()
-
-    if isinstance(self._op1, PlaceholderOp) or isinstance(
-        self._op1, ConstantOp):
-      # op1 is the coefficient of this formula
-      op1_grad = self._op1.forward()
-
-      if isinstance(self._op2, PlaceholderOp) or isinstance(
-          self._op2, ConstantOp):
-        # two elements are both constant values
-        op2_grad = 0
-      else:
-        # op2 may has VariableOp
-        op2_grad = self._op2.grad(partial_derivative_opname)
+  def replace_input(self, input_op, new_input_op):
+    if self._op1 is input_op:
+      self._op1 = new_input_op
+    if self._op2 is input_op:
+      self._op2 = new_input_op
+
+  def compute(self, input_value1, input_value2):
+    return input_value1 / input_value2
 
-      # Reciprocal rule, refer to https://en.wikipedia.org/wiki/Reciprocal_rule
-      #import ipdb;ipdb.set_trace()
-      result = self._op1.forward() * -float(op2_grad) / math.pow(op2_value, 2)
-    elif isinstance(self._op2, PlaceholderOp) or isinstance(
-        self._op2, ConstantOp):
-      # op2 is the coefficient of this formula
-      op2_grad = self._op2.forward()
+  def backward(self, output_grad, input_value1, input_value2):
+    return [
+        _unbroadcast(output_grad / input_value2, input_value1),
+        _unbroadcast(-output_grad * input_value1 /
+                     (input_value2 * input_value2), input_value2)
+    ]
 
-      # op1 may has VariableOp
-      op1_grad = self._op1.grad(partial_derivative_opname)
-      result = float(op1_grad) / op2_value
 
+class EmbeddingLookupOp(Op):
+  """
+  The operation which gathers the rows of params by ids. The gradient of
+  params is IndexedSlices of the looked up rows, so the optimizers only
+  update these rows instead of the whole table.
+  """
+
+  __slots__ = ("_params", "_ids")
+
+  def __init__(self, params, ids, name="EmbeddingLookup"):
+    super(EmbeddingLookupOp, self).__init__(name)
+
+    if not isinstance(params, Op):
+      self._params = ConstantOp(params)
     else:
-      # op1 and op2 may has VariableOp
-      #logging.error(
-      #  "Not support complex formula which has divided by VariableOp")
-      #raise NotImplementedError
-
-      op1_grad = self._op1.grad(partial_derivative_opname)
-      op2_grad = self._op2.grad(partial_derivative_opname)
-
-      if op2_value != 0:
-        # Quotient rule, refer to https://en.wikipedia.org/wiki/Quotient_rule
-        result = (op1_grad * op2_value - op1_value * op2_grad) / math.pow(
-            op2_value, 2)
-      else:
-        # TODO: Compute when division by zero
-        raise NotImplementedError
+      self._params = params
 
-    return result
+    if not isinstance(ids, Op):
+      self._ids = ConstantOp(ids)
+    else:
+      self._ids = ids
+
+    self._graph = graph.get_default_graph()
+    self._graph.add_to_graph(self)
+
+  def get_inputs(self):
+    return [self._params, self._ids]
+
+  def replace_input(self, input_op, new_input_op):
+    if self._params is input_op:
+      self._params = new_input_op
+    if self._ids is input_op:
+      self._ids = new_input_op
+
+  def compute(self, params_value, ids_value):
+    return np.take(params_value, np.asarray(ids_value, dtype=np.int64), axis=0)
+
+  def backward(self, output_grad, params_value, ids_value):
+    ids_value = np.asarray(ids_value, dtype=np.int64)
+    row_shape = np.shape(params_value)[1:]
+    values = np.broadcast_to(output_grad, ids_value.shape + row_shape)
+    return [
+        IndexedSlices(
+            ids_value.ravel(), values.reshape((-1,) + row_shape),
+            np.shape(params_value)), None
+    ]
+
+
+class IndexedSlices(object):
+  """
+  The sparse gradient of a table which is the sum of the rows of values at
+  the rows of indices. The indices may be duplicated.
+  """
+
+  __slots__ = ("_indices", "_values", "_dense_shape")
+
+  # Make NumPy arrays defer to the operators of IndexedSlices
+  __array_ufunc__ = None
+
+  def __init__(self, indices, values, dense_shape):
+    self._indices = indices
+    self._values = values
+    self._dense_shape = tuple(dense_shape)
+
+  def get_indices(self):
+    return self._indices
+
+  def get_values(self):
+    return self._values
+
+  def get_dense_shape(self):
+    return self._dense_shape
+
+  def to_dense(self):
+    dense_value = np.zeros(self._dense_shape, dtype=self._values.dtype)
+    np.add.at(dense_value, self._indices, self._values)
+    return dense_value
+
+  def __add__(self, other):
+    if isinstance(other, IndexedSlices):
+      return IndexedSlices(
+          np.concatenate([self._indices, other._indices]),
+          np.concatenate([self._values, other._values]), self._dense_shape)
+    return self.to_dense() + other
+
+  def __radd__(self, other):
+    return self.__add__(other)
+
+  def __mul__(self, other):
+    if np.ndim(other) == 0:
+      return IndexedSlices(self._indices, self._values * other,
+                           self._dense_shape)
+    return self.to_dense() * other
+
+  def __rmul__(self, other):
+    return self.__mul__(other)
+
+  def __neg__(self):
+    return IndexedSlices(self._indices, -self._values, self._dense_shape)
+
+
+class LossGradientOp(Op):
+  """
+  The operation which computes the initial gradient of the loss for the
+  reduction of "sum" or "mean", which is the start of the gradient ops.
+  """
+
+  __slots__ = ("_loss", "_reduction")
+
+  def __init__(self, loss, reduction="sum", name="LossGradient"):
+    super(LossGradientOp, self).__init__(name)
+
+    if reduction not in ("sum", "mean"):
+      raise ValueError("Unsupported gradient reduction: {}".format(reduction))
+
+    self._loss = loss
+    self._reduction = reduction
+
+    self._graph = graph.get_default_graph()
+    self._graph.add_to_graph(self)
+
+  def get_reduction(self):
+    return self._reduction
+
+  def get_inputs(self):
+    return [self._loss]
+
+  def replace_input(self, input_op, new_input_op):
+    if self._loss is input_op:
+      self._loss = new_input_op
+
+  def compute(self, loss_value):
+    return _get_loss_grad(loss_value, self._reduction)
+
+
+class UnbroadcastOp(Op):
+  """
+  The operation which sums the gradient over the axes which were broadcast
+  for the input, so the gradient has the same shape as the input.
+  """
+
+  __slots__ = ("_grad_op", "_input_op")
+
+  def __init__(self, grad, input, name="Unbroadcast"):
+    super(UnbroadcastOp, self).__init__(name)
+    self._grad_op = grad
+    self._input_op = input
+
+    self._graph = graph.get_default_graph()
+    self._graph.add_to_graph(self)
+
+  def get_inputs(self):
+    return [self._grad_op, self._input_op]
+
+  def replace_input(self, input_op, new_input_op):
+    if self._grad_op is input_op:
+      self._grad_op = new_input_op
+    if self._input_op is input_op:
+      self._input_op = new_input_op
+
+  def compute(self, grad_value, input_value):
+    return _unbroadcast(grad_value, input_value)
+
+
+class BackwardOp(Op):
+  """
+  The operation which computes the gradient of one input of the op with its
+  backward(). It is used for the ops without registered gradient functions.
+  """
+
+  __slots__ = ("_op", "_position", "_grad_op")
+
+  def __init__(self, op, position, grad, name="Backward"):
+    super(BackwardOp, self).__init__(name)
+    self._op = op
+    self._position = position
+    self._grad_op = grad
+
+    self._graph = graph.get_default_graph()
+    self._graph.add_to_graph(self)
+
+  def get_op(self):
+    return self._op
+
+  def get_position(self):
+    return self._position
+
+  def get_inputs(self):
+    return [self._grad_op] + list(self._op.get_inputs())
+
+  def replace_input(self, input_op, new_input_op):
+    if self._grad_op is input_op:
+      self._grad_op = new_input_op
+    # The op shares the inputs and is rewired in the same way
+    if input_op in self._op.get_inputs():
+      self._op.replace_input(input_op, new_input_op)
+
+  def compute(self, grad_value, *input_values):
+    return self._op.backward(grad_value, *input_values)[self._position]
 
 
 class UpdateVariableOp(Op):
   # TODO: Deprecated op
 
+  __slots__ = ("variableOp", "value", "graph")
+
   def __init__(self, variableOp, value, name="UpdateVariableOp"):
     self.variableOp = variableOp
     self.value = value
@@ -567,12 +879,17 @@ class UpdateVariableOp(Op):
     self.variableOp.set_value(self.value)
     return self.value
 
+  def compute(self):
+    return self.forward()
+
   # TODO: Add grad() if needed
 
 
 class UpdateVariableNOp(Op):
   # TODO: Deprecated op
 
+  __slots__ = ("variableop_value_map", "graph")
+
   def __init__(self, variableop_value_map, name="UpdateVariableNOp"):
     self.variableop_value_map = variableop_value_map
     self.name = name
@@ -586,15 +903,20 @@ class UpdateVariableNOp(Op):
       variableOp.set_value(value)
     return self.variableop_value_map
 
+  def compute(self):
+    return self.forward()
+
 
 class GlobalVariablesInitializerOp(Op):
+  __slots__ = ()
+
   def __init__(self, name="GlobalVariablesInitializer"):
     super(GlobalVariablesInitializerOp, self).__init__(name)
 
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
+  def compute(self):
     pass
 
   def grad(self):
@@ -602,19 +924,142 @@ class GlobalVariablesInitializerOp(Op):
 
 
 class LocalVariablesInitializerOp(Op):
+  __slots__ = ()
+
   def __init__(self, name="LocalVariablesInitializer"):
     super(LocalVariablesInitializerOp, self).__init__(name)
 
     self._graph = graph.get_default_graph()
     self._graph.add_to_graph(self)
 
-  def forward(self):
+  def compute(self):
     pass
 
   def grad(self):
     raise NotImplementedError
 
 
+def _evaluate(activation_ops):
+  """Evaluate the ops in topological order and return their values."""
+  op_index_map = {}
+  activations = []
+  for op in activation_ops:
+    input_values = [
+        activations[op_index_map[input_op]] for input_op in op.get_inputs()
+    ]
+    op_index_map[op] = len(activations)
+    activations.append(op.compute(*input_values))
+  return activations
+
+
+def _schedule_backward(activation_ops, target_ops):
+  """
+  Return the steps of the reverse sweep over the ops in topological order.
+  The gradients only flow into the ops which depend on the target ops.
+  """
+  op_index_map = {op: index for index, op in enumerate(activation_ops)}
+  target_ops = set(target_ops)
+
+  require_grad_ops = set()
+  backward_steps = []
+  for index, op in enumerate(activation_ops):
+    input_ops = op.get_inputs()
+    grad_positions = [
+        position for position, input_op in enumerate(input_ops)
+        if input_op in require_grad_ops
+    ]
+    if op in target_ops or grad_positions:
+      require_grad_ops.add(op)
+    if grad_positions:
+      input_indexes = [op_index_map[input_op] for input_op in input_ops]
+      backward_steps.append((index, op, input_indexes, grad_positions))
+
+  backward_steps.reverse()
+  return backward_steps
+
+
+def _run_backward(backward_steps, activations, output_grad):
+  """
+  Run the reverse sweep from the gradient of the last activation and return
+  the accumulated gradients of all the activations, or None if no gradient.
+  """
+  op_grads = [None] * len(activations)
+  op_grads[-1] = output_grad
+
+  for index, op, input_indexes, grad_positions in backward_steps:
+    output_grad = op_grads[index]
+    if output_grad is None:
+      continue
+
+    input_values = [activations[input_index] for input_index in input_indexes]
+    input_grads = op.backward(output_grad, *input_values)
+
+    # Accumulate the gradients of the ops with multiple consumers
+    for position in grad_positions:
+      input_index = input_indexes[position]
+      if op_grads[input_index] is None:
+        op_grads[input_index] = input_grads[position]
+      else:
+        op_grads[input_index] = op_grads[input_index] + input_grads[position]
+
+  return op_grads
+
+
+def _cast_value(value, dtype, shape, name):
+  """Convert the fed value to the dtype and check the shape."""
+  if dtype is None and shape is None:
+    return value
+
+  value = np.asarray(value, dtype=dtype)
+
+  if shape is not None:
+    if len(shape) != value.ndim or any(
+        size is not None and size != value_size
+        for size, value_size in zip(shape, value.shape)):
+      raise ValueError("Cannot feed value of shape {} for {} of shape {}".
+                       format(value.shape, name, tuple(shape)))
+
+  return value
+
+
+def _get_loss_grad(loss_value, reduction):
+  """Return the initial gradient of the loss for the reduction."""
+  if reduction == "mean" and np.ndim(loss_value) > 0:
+    return np.full(np.shape(loss_value), 1.0 / np.size(loss_value))
+  else:
+    # Every element of the batch loss contributes to the gradients
+    return _ones_like(loss_value)
+
+
+def _ones_like(value):
+  if np.ndim(value) == 0:
+    return 1
+  else:
+    return np.ones_like(value)
+
+
+def _unbroadcast(grad, input_value):
+  """Sum the gradient over the axes which were broadcast for the input."""
+  input_shape = np.shape(input_value)
+  if isinstance(grad, IndexedSlices):
+    if grad.get_dense_shape() == input_shape:
+      return grad
+    grad = grad.to_dense()
+
+  grad_shape = np.shape(grad)
+  if grad_shape == input_shape:
+    return grad
+
+  leading_axis_number = len(grad_shape) - len(input_shape)
+  if leading_axis_number < 0:
+    return np.broadcast_to(grad, input_shape)
+
+  axes = tuple(range(leading_axis_number)) + tuple(
+      leading_axis_number + axis for axis, size in enumerate(input_shape)
+      if size == 1 and grad_shape[leading_axis_number + axis] != 1)
+  return np.reshape(np.sum(grad, axis=axes), input_shape)
+
+
 def get_variable(name="Variable",
                  value=None,
                  shape=None,
@@ -14,12 +14,19 @@
 
 import unittest
 
-from ops import Op
-from ops import ConstantOp
-from ops import VariableOp
-from ops import PlaceholderOp
-from ops import SquareOp
-from ops import DivideOp
+import numpy as np
+
+from miniflow.ops import Op
+from miniflow.ops import ConstantOp
+from miniflow.ops import VariableOp
+from miniflow.ops import PlaceholderOp
+from miniflow.ops import SquareOp
+from miniflow.ops import DivideOp
+from miniflow.ops import MultipleOp
+from miniflow.ops import AddOp
+from miniflow.ops import EmbeddingLookupOp
+from miniflow.ops import IndexedSlices
+from miniflow.session import Session
 
 
 class OpTest(unittest.TestCase):
@@ -46,6 +53,113 @@ class OpTest(unittest.TestCase):
       foo.grad()
 
 
+class PlaceholderOpTest(unittest.TestCase):
+  def test_cast_value(self):
+    x = PlaceholderOp(np.float32, shape=[None, 2])
+    value = x.cast_value([[1, 2], [3, 4], [5, 6]])
+    self.assertEqual(value.dtype, np.float32)
+    self.assertEqual(value.shape, (3, 2))
+
+    with self.assertRaises(ValueError):
+      x.cast_value([1, 2])
+
+  def test_cast_value_without_dtype(self):
+    x = PlaceholderOp()
+    self.assertEqual(x.cast_value("foo"), "foo")
+
+
+class VariableOpTest(unittest.TestCase):
+  def test_assign_sub(self):
+    a = VariableOp(np.ones(2))
+    value = a.get_value()
+    a.assign_sub(np.ones(2))
+    np.testing.assert_array_equal(a.get_value(), [0.0, 0.0])
+    np.testing.assert_array_equal(value, [1.0, 1.0])
+
+    # The array of the in-place value is updated
+    array = np.ones(2, np.float32)
+    a.set_in_place_value(array)
+    a.assign_sub(np.full(2, 0.5))
+    self.assertIs(a.get_value(), array)
+    np.testing.assert_array_equal(array, [0.5, 0.5])
+
+    # The float update of the integer array is not truncated
+    a.set_in_place_value(np.ones(2, np.int64))
+    self.assertRaises(TypeError, a.assign_sub, np.full(2, 0.5))
+
+    a.set_value(np.zeros(2))
+    self.assertFalse(a.is_in_place())
+
+  def test_fetch_after_sparse_update(self):
+    table = VariableOp(np.ones((4, 2)))
+    table.assign_sub(IndexedSlices(np.array([1]), np.ones((1, 2)), (4, 2)))
+    self.assertTrue(table.is_in_place())
+
+    value = Session().run(table)
+    forward_value = table.forward()
+    table.assign_sub(IndexedSlices(np.array([0]), np.ones((1, 2)), (4, 2)))
+    np.testing.assert_array_equal(value[0], [1.0, 1.0])
+    np.testing.assert_array_equal(forward_value[0], [1.0, 1.0])
+
+  def test_assign_sub_indexed_slices(self):
+    value = np.ones((4, 2))
+    a = VariableOp(value)
+    a.assign_sub(IndexedSlices(np.array([1, 3, 1]), np.ones((3, 2)), (4, 2)))
+    np.testing.assert_array_equal(a.get_value(),
+                                  [[1.0, 1.0], [-1.0, -1.0], [1.0, 1.0],
+                                   [0.0, 0.0]])
+    np.testing.assert_array_equal(value, np.ones((4, 2)))
+
+    # The copied value is updated in place for the following updates
+    updated_value = a.get_value()
+    a.assign_sub(IndexedSlices(np.array([0]), np.ones((1, 2)), (4, 2)))
+    self.assertIs(a.get_value(), updated_value)
+    np.testing.assert_array_equal(updated_value[0], [0.0, 0.0])
+
+
+class EmbeddingLookupOpTest(unittest.TestCase):
+  def test_compute_and_backward(self):
+    params_value = np.arange(8.0).reshape(4, 2)
+    ids_value = [[3, 0], [3, 3]]
+    a = EmbeddingLookupOp(VariableOp(params_value), PlaceholderOp(np.int64))
+
+    result = a.compute(params_value, ids_value)
+    np.testing.assert_array_equal(result, params_value[[[3, 0], [3, 3]]])
+
+    params_grad, ids_grad = a.backward(np.ones((2, 2, 2)), params_value,
+                                       ids_value)
+    self.assertIsInstance(params_grad, IndexedSlices)
+    self.assertIsNone(ids_grad)
+    np.testing.assert_array_equal(params_grad.get_indices(), [3, 0, 3, 3])
+    np.testing.assert_array_equal(params_grad.to_dense(),
+                                  [[1.0, 1.0], [0.0, 0.0], [0.0, 0.0],
+                                   [3.0, 3.0]])
+
+    # The sparse gradients are concatenated or added to the dense gradients
+    double_grad = params_grad + params_grad * 2.0
+    np.testing.assert_array_equal(double_grad.get_indices(),
+                                  [3, 0, 3, 3, 3, 0, 3, 3])
+    np.testing.assert_array_equal(params_grad + np.ones((4, 2)),
+                                  [[2.0, 2.0], [1.0, 1.0], [1.0, 1.0],
+                                   [4.0, 4.0]])
+
+
+class BroadcastTest(unittest.TestCase):
+  def test_backward(self):
+    a_value = np.array([[1.0], [2.0]])
+    b_value = np.array([[10.0, 20.0, 30.0]])
+    c = MultipleOp(ConstantOp(a_value), ConstantOp(b_value))
+
+    a_grad, b_grad = c.backward(np.ones((2, 3)), a_value, b_value)
+    np.testing.assert_allclose(a_grad, [[60.0], [60.0]])
+    np.testing.assert_allclose(b_grad, [[3.0, 3.0, 3.0]])
+
+    # The scalar input gets the sum of the gradients
+    d = MultipleOp(VariableOp(2.0), ConstantOp(b_value))
+    d_grad, _ = d.backward(np.ones((1, 3)), 2.0, b_value)
+    self.assertEqual(d_grad, 60.0)
+
+
 class SquareOpTest(unittest.TestCase):
   def test_SquareOp(self):
     w = VariableOp(10)
@@ -54,15 +168,11 @@ class SquareOpTest(unittest.TestCase):
     x.set_value(2.0)
     y = PlaceholderOp(float)
     y.set_value(3.0)
-    """
+
     loss = SquareOp(y - (w * x + b))
-    print("w: {}, forward: {}, grad: {}".format(w.get_value(),
-                                                loss.forward(),
-                                                loss.grad(w.get_name())))  # 148.0
-    print("b: {}, forward: {}, grad: {}".format(b.get_value(),
-                                                loss.forward(),
-                                                loss.grad(b.get_name())))  # 74.0
-    """
+    self.assertEqual(loss.forward(), 1369.0)
+    self.assertEqual(loss.grad(w.get_name()), 148.0)
+    self.assertEqual(loss.grad(b.get_name()), 74.0)
 
 
 class DivideOpTest(unittest.TestCase):
@@ -89,5 +199,19 @@ class DivideOpTest(unittest.TestCase):
     self.assertEqual(result, -float(10) / 400)
 
 
+class DeepGraphTest(unittest.TestCase):
+  def test_forward_and_grad(self):
+    depth = 5000
+    x = VariableOp(1.0)
+    one = ConstantOp(1.0)
+    y = x
+    for index in range(depth):
+      y = AddOp(y, one, name="Chain_{}".format(index))
+
+    self.assertEqual(y.forward(), depth + 1.0)
+    self.assertEqual(y.grad(x.get_name()), 1.0)
+    self.assertEqual(Session().run(y), depth + 1.0)
+
+
 if __name__ == '__main__':
   unittest.main()
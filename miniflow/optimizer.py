@@ -12,23 +12,58 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
+
+from . import gradients_impl
 from . import graph
 from . import session
 from . import ops
 
 
 class OptimizerMinimizeOp(ops.Op):
-  def __init__(self, optimizer, loss, name="OptimizerMinimize"):
-    super(OptimizerMinimizeOp, self).__init__()
+  """
+  The operation which applies the gradients of the loss with the optimizer.
+  The gradients are computed by the gradient ops of the trainable variables
+  which are its inputs, so the backward pass is planned and compiled like
+  the other ops.
+  """
+
+  __slots__ = ("_optimizer", "_loss", "_variable_names", "_grad_ops")
+
+  def __init__(self, optimizer, loss, reduction="mean",
+               name="OptimizerMinimize"):
+    super(OptimizerMinimizeOp, self).__init__(name)
 
     self._optimizer = optimizer
     self._loss = loss
 
     self._graph = loss._graph
+    variablename_grad_op_map = optimizer.get_gradient_ops(loss, reduction)
+    self._variable_names = list(variablename_grad_op_map.keys())
+    self._grad_ops = list(variablename_grad_op_map.values())
+
     self._graph.add_to_graph(self)
 
-  def forward(self):
-    variablename_grad_map = self._optimizer.compute_gradients(self._loss)
+  def get_optimizer(self):
+    return self._optimizer
+
+  def get_variable_names(self):
+    return self._variable_names
+
+  def get_inputs(self):
+    return self._grad_ops
+
+  def replace_input(self, input_op, new_input_op):
+    self._grad_ops = [
+        new_input_op if grad_op is input_op else grad_op
+        for grad_op in self._grad_ops
+    ]
+
+  def compute(self, *grads):
+    # The variables which are created after this op get no gradients
+    variablename_grad_map = dict.fromkeys(
+        self._graph.get_trainable_variables_collection(), 0)
+    variablename_grad_map.update(zip(self._variable_names, grads))
     self._optimizer.apply_gradients(variablename_grad_map)
 
   def grad(self):
@@ -36,17 +71,59 @@ class OptimizerMinimizeOp(ops.Op):
 
 
 class Optimizer(object):
+  # The slots and the attributes which are kept across the updates, while
+  # the other slots are scratch arrays
+  _STATE_SLOT_NAMES = ()
+  _STATE_ATTRIBUTE_NAMES = ()
+
   def __init__(self, name="Optimizer"):
     self.name = name
 
-  def minimize(self, loss):
-    pass
+    self._graph = graph.get_default_graph()
+
+    # The gradient ops of each loss and reduction shared by the minimize ops
+    self._loss_grad_ops_map = {}
+
+    # The flat views of the trainable variables and their slots
+    self._slot_layout = None
+
+  def minimize(self, loss, global_step=None, reduction="mean"):
+    return OptimizerMinimizeOp(self, loss, reduction)
 
-  def compute_gradients(self):
-    pass
+  def compute_gradients(self, loss, reduction="mean"):
+    # Evaluate the gradient ops of all trainable variables in one sweep
+    variablename_grad_op_map = self.get_gradient_ops(loss, reduction)
+    activation_ops = graph.get_topological_order(
+        list(variablename_grad_op_map.values()))
+    op_value_map = dict(zip(activation_ops, ops._evaluate(activation_ops)))
+    return {
+        variable_name: op_value_map[grad_op]
+        for variable_name, grad_op in variablename_grad_op_map.items()
+    }
 
-  def apply_gradients(self):
-    pass
+  def apply_gradients(self, variablename_grad_map):
+    raise NotImplementedError
+
+  def get_gradient_ops(self, loss, reduction="mean"):
+    """
+    Return the map of the trainable variable names and the ops computing the
+    gradients of the loss, which are built by gradients() and can be fetched
+    as one dict. The batch gradients are reduced by "mean" or "sum" over the
+    elements of the loss.
+    """
+    variablename_variable_map = self._graph.get_trainable_variables_collection(
+    )
+    key = (loss, reduction, tuple(variablename_variable_map.keys()))
+    if key not in self._loss_grad_ops_map:
+      grad_ops = gradients_impl.gradients(
+          loss, list(variablename_variable_map.values()), reduction)
+      # The variables which do not affect the loss get zero gradients
+      self._loss_grad_ops_map[key] = {
+          variable_name: ops.ConstantOp(0) if grad_op is None else grad_op
+          for variable_name, grad_op in zip(variablename_variable_map.keys(),
+                                            grad_ops)
+      }
+    return self._loss_grad_ops_map[key]
 
   def get_name(self):
     return self.name
@@ -54,14 +131,11 @@ class Optimizer(object):
   def set_name(self, name):
     self.name = name
 
+  def get_graph(self):
+    return self._graph
 
-class GradientDescentOptimizer(Optimizer):
-  def __init__(self, learning_rate=0.01, name="GradientDescent"):
-    super(GradientDescentOptimizer, self).__init__(name)
-
-    self._learning_rate = learning_rate
-
-    self._graph = graph.get_default_graph()
+  def set_graph(self, graph):
+    self._graph = graph
 
   def get_learning_rate(self):
     return self._learning_rate
@@ -70,28 +144,62 @@ class GradientDescentOptimizer(Optimizer):
     # TODO: Check type of parameter
     self._learning_rate = learning_rate
 
-  def get_graph(self):
-    return self._graph
-
-  def set_graph(self, graph):
-    self._graph = graph
-
-  def minimize(self, loss, global_step=None):
-    return OptimizerMinimizeOp(self, loss)
-
-  def compute_gradients(self, loss):
-
+  def get_state_slot_names(self):
+    return self._STATE_SLOT_NAMES
+
+  def get_state_slots(self):
+    """
+    Return the flat arrays of the state slots of the trainable variables,
+    which can be updated in place to restore the state.
+    """
+    if not self._STATE_SLOT_NAMES:
+      return []
+    slot_layout = self._get_slot_layout()
+    return [slot_layout.get_slot(name) for name in self._STATE_SLOT_NAMES]
+
+  def get_state_attributes(self):
+    return [getattr(self, name) for name in self._STATE_ATTRIBUTE_NAMES]
+
+  def set_state_attributes(self, values):
+    for name, value in zip(self._STATE_ATTRIBUTE_NAMES, values):
+      setattr(self, name, type(getattr(self, name))(value))
+
+  def _get_parameter_buffer(self):
+    """Return the ParameterBuffer which can update the variables, or None."""
+    parameter_buffer = self._graph.get_parameter_buffer()
+    if parameter_buffer is None or not parameter_buffer.is_attached():
+      return None
+    return parameter_buffer
+
+  def _get_slot_layout(self):
+    """
+    Return the _SlotLayout of the current trainable variables, which is
+    created again with zero slots if the variables are changed.
+    """
     variablename_variable_map = self._graph.get_trainable_variables_collection(
     )
+    parameter_buffer = self._get_parameter_buffer()
+    if self._slot_layout is None or not self._slot_layout.is_valid(
+        variablename_variable_map, parameter_buffer):
+      self._slot_layout = _SlotLayout(variablename_variable_map,
+                                      parameter_buffer)
+    return self._slot_layout
 
-    variablename_grad_map = {}
-    for variable_name, variable in variablename_variable_map.items():
-      grad = loss.grad(variable_name)
-      variablename_grad_map[variable_name] = grad
 
-    return variablename_grad_map
+class GradientDescentOptimizer(Optimizer):
+  def __init__(self, learning_rate=0.01, name="GradientDescent"):
+    super(GradientDescentOptimizer, self).__init__(name)
+
+    self._learning_rate = learning_rate
 
   def apply_gradients(self, variablename_grad_map):
+    # Update all the variables in one step if they share the flat buffer
+    parameter_buffer = self._get_parameter_buffer()
+    if parameter_buffer is not None:
+      parameter_buffer.gather_grads(variablename_grad_map,
+                                    -self._learning_rate)
+      parameter_buffer.axpy(1.0)
+      return
 
     variablename_variable_map = self._graph.get_trainable_variables_collection(
     )
@@ -99,28 +207,205 @@ class GradientDescentOptimizer(Optimizer):
     for variable_name, variable in variablename_variable_map.items():
       grad = variablename_grad_map[variable_name]
       final_grad = self._learning_rate * grad
-      variable.set_value(variable.get_value() - final_grad)
+      variable.assign_sub(final_grad)
 
 
 class AdagradOptimizer(Optimizer):
-  pass
+  """
+  The optimizer which scales the learning rate of each parameter by the
+  inverse square root of the sum of its squared gradients.
+  """
+
+  _STATE_SLOT_NAMES = ("accumulator",)
+
+  def __init__(self,
+               learning_rate=0.01,
+               initial_accumulator_value=0.1,
+               name="Adagrad"):
+    super(AdagradOptimizer, self).__init__(name)
+    self._learning_rate = learning_rate
+    self._initial_accumulator_value = initial_accumulator_value
+
+  def apply_gradients(self, variablename_grad_map):
+    slot_layout = self._get_slot_layout()
+    grads = slot_layout.gather_grads(variablename_grad_map)
+    accumulators = slot_layout.get_slot("accumulator",
+                                        self._initial_accumulator_value)
+    delta = slot_layout.get_slot("delta")
+
+    # accumulator += grad^2, delta = learning_rate * grad / sqrt(accumulator)
+    np.square(grads, out=delta)
+    accumulators += delta
+    np.sqrt(accumulators, out=delta)
+    np.divide(grads, delta, out=delta)
+    delta *= self._learning_rate
+    slot_layout.apply_delta(delta)
 
 
 class MomentumOptimizer(Optimizer):
-  pass
+  """
+  The optimizer which updates the parameters with the accumulation of the
+  decayed gradients, or with the Nesterov momentum if use_nesterov.
+  """
+
+  _STATE_SLOT_NAMES = ("momentum",)
+
+  def __init__(self,
+               learning_rate=0.01,
+               momentum=0.9,
+               use_nesterov=False,
+               name="Momentum"):
+    super(MomentumOptimizer, self).__init__(name)
+    self._learning_rate = learning_rate
+    self._momentum = momentum
+    self._use_nesterov = use_nesterov
+
+  def get_momentum(self):
+    return self._momentum
+
+  def apply_gradients(self, variablename_grad_map):
+    slot_layout = self._get_slot_layout()
+    grads = slot_layout.gather_grads(variablename_grad_map)
+    accumulations = slot_layout.get_slot("momentum")
+    delta = slot_layout.get_slot("delta")
+
+    # accumulation = momentum * accumulation + grad
+    accumulations *= self._momentum
+    accumulations += grads
+    if self._use_nesterov:
+      # delta = learning_rate * (grad + momentum * accumulation)
+      np.multiply(accumulations, self._momentum, out=delta)
+      delta += grads
+      delta *= self._learning_rate
+    else:
+      np.multiply(accumulations, self._learning_rate, out=delta)
+    slot_layout.apply_delta(delta)
 
 
 class AdamOptimizer(Optimizer):
+  """
+  The optimizer which updates the parameters with the bias-corrected moving
+  averages of the gradients and the squared gradients.
+  """
+
+  _STATE_SLOT_NAMES = ("m", "v")
+  _STATE_ATTRIBUTE_NAMES = ("_step_number",)
+
   def __init__(self,
                learning_rate=0.01,
                beta1=0.9,
                beta2=0.99,
                epsilon=0.01,
                name="Adam"):
-    super(GradientDescentOptimizer, self).__init__(name)
+    super(AdamOptimizer, self).__init__(name)
     self._learning_rate = learning_rate
     self._beta1 = beta1
     self._beta2 = beta2
     self._epsilon = epsilon
-    self._m = []
-    self._v = []
+
+    # The number of the applied updates for the bias correction
+    self._step_number = 0
+
+  def apply_gradients(self, variablename_grad_map):
+    slot_layout = self._get_slot_layout()
+    grads = slot_layout.gather_grads(variablename_grad_map)
+    m = slot_layout.get_slot("m")
+    v = slot_layout.get_slot("v")
+    delta = slot_layout.get_slot("delta")
+
+    self._step_number += 1
+    learning_rate = self._learning_rate * np.sqrt(
+        1 - self._beta2**self._step_number) / (1 - self._beta1**
+                                               self._step_number)
+
+    # m += (1 - beta1) * (grad - m), v += (1 - beta2) * (grad^2 - v)
+    np.subtract(grads, m, out=delta)
+    delta *= 1 - self._beta1
+    m += delta
+    np.square(grads, out=delta)
+    delta -= v
+    delta *= 1 - self._beta2
+    v += delta
+
+    # delta = learning_rate * m / (sqrt(v) + epsilon)
+    np.sqrt(v, out=delta)
+    delta += self._epsilon
+    np.divide(m, delta, out=delta)
+    delta *= learning_rate
+    slot_layout.apply_delta(delta)
+
+
+class _SlotLayout(object):
+  """
+  The flat gradients and slots of the trainable variables. The slot of each
+  variable is the view of the flat slot array at the same offset, so the
+  optimizers update all the variables with a few vectorized operations. If
+  the variables are backed by the ParameterBuffer, its arrays are used.
+  """
+
+  def __init__(self, variablename_variable_map, parameter_buffer):
+    self._parameter_buffer = parameter_buffer
+
+    # Example: [("w", VariableOp, 0, 6)]
+    self._items = []
+    offset = 0
+    for variable_name, variable in variablename_variable_map.items():
+      size = int(np.size(variable.get_value()))
+      self._items.append((variable_name, variable, offset, size))
+      offset += size
+
+    if parameter_buffer is None:
+      self._grads = np.zeros(offset)
+    else:
+      self._grads = parameter_buffer.get_grads()
+
+    # Example: {"m": np.array([0.0, 0.0])}
+    self._name_slot_map = {}
+
+  def is_valid(self, variablename_variable_map, parameter_buffer):
+    """Return whether the variables and their sizes are not changed."""
+    if self._parameter_buffer is not parameter_buffer or len(
+        self._items) != len(variablename_variable_map):
+      return False
+    for (_, variable, _, size), new_variable in zip(
+        self._items, variablename_variable_map.values()):
+      if variable is not new_variable or np.size(
+          new_variable.get_value()) != size:
+        return False
+    return True
+
+  def get_slot(self, name, initial_value=0.0):
+    if name not in self._name_slot_map:
+      self._name_slot_map[name] = np.full(len(self._grads), initial_value,
+                                          dtype=self._grads.dtype)
+    return self._name_slot_map[name]
+
+  def gather_grads(self, variablename_grad_map):
+    """Copy the gradients into the flat array and return it."""
+    if self._parameter_buffer is not None:
+      self._parameter_buffer.gather_grads(variablename_grad_map)
+      return self._grads
+
+    for variable_name, variable, offset, size in self._items:
+      grad = variablename_grad_map[variable_name]
+      if isinstance(grad, ops.IndexedSlices):
+        # The slots are updated for all the rows like the dense gradients
+        grad = grad.to_dense()
+      self._grads[offset:offset + size] = np.ravel(
+          np.broadcast_to(grad, np.shape(variable.get_value())))
+    return self._grads
+
+  def apply_delta(self, delta):
+    """Subtract the flat delta from the variables."""
+    if self._parameter_buffer is not None:
+      parameter_array = self._parameter_buffer.get_parameters()
+      np.subtract(parameter_array, delta, out=parameter_array)
+      return
+
+    for _, variable, offset, size in self._items:
+      value = variable.get_value()
+      if np.ndim(value) == 0:
+        variable.assign_sub(delta[offset])
+      else:
+        variable.assign_sub(delta[offset:offset + size].reshape(
+            np.shape(value)))
@@ -14,8 +14,17 @@
 
 import unittest
 
-from optimizer import Optimizer
-from optimizer import GradientDescentOptimizer
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.optimizer import AdagradOptimizer
+from miniflow.optimizer import AdamOptimizer
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.optimizer import MomentumOptimizer
+from miniflow.optimizer import Optimizer
+from miniflow.session import Session
 
 
 class OptimizerTest(unittest.TestCase):
@@ -52,11 +61,271 @@ class GradientDescentOptimizerTest(unittest.TestCase):
 
   def test_compute_gradients(self):
     foo = GradientDescentOptimizer(learning_rate=0.1)
-    """ TODO: Add more tests
-    optimizer.minimize(loss)
-    sess = session.Session()
-    sess.run(optimizer)
-    """
+    w = ops.VariableOp(10)
+    b = ops.VariableOp(20)
+    x = ops.PlaceholderOp(float)
+    x.set_value(2.0)
+    y = ops.PlaceholderOp(float)
+    y.set_value(3.0)
+    loss = ops.SquareOp(y - (w * x + b))
+
+    variablename_grad_map = foo.compute_gradients(loss)
+    self.assertEqual(variablename_grad_map[w.get_name()], 148.0)
+    self.assertEqual(variablename_grad_map[b.get_name()], 74.0)
+
+  def test_compute_gradients_with_shared_op(self):
+    foo = GradientDescentOptimizer(learning_rate=0.1)
+    w = ops.VariableOp(3.0)
+    predict = w * w
+    loss = predict * predict + predict
+
+    # loss = w^4 + w^2, d(loss)/dw = 4 * w^3 + 2 * w
+    variablename_grad_map = foo.compute_gradients(loss)
+    self.assertEqual(variablename_grad_map[w.get_name()], 114.0)
+
+  def test_compute_gradients_with_batch(self):
+    foo = GradientDescentOptimizer(learning_rate=0.1)
+    w = ops.VariableOp(2.0)
+    b = ops.VariableOp(1.0)
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    loss = ops.SquareOp(w * x + b)
+    sum_grad_ops = foo.get_gradient_ops(loss, "sum")
+    mean_grad_ops = foo.get_gradient_ops(loss, "mean")
+    self.assertIs(foo.get_gradient_ops(loss, "sum"), sum_grad_ops)
+
+    with Session() as sess:
+      sum_grad_map, mean_grad_map = sess.run(
+          [sum_grad_ops, mean_grad_ops],
+          feed_dict={x: [1.0, 2.0, 3.0]})
+    # d(loss)/dw = sum(2 * (w * x + b) * x), d(loss)/db = sum(2 * (w * x + b))
+    self.assertEqual(sum_grad_map[w.get_name()], 68.0)
+    self.assertEqual(sum_grad_map[b.get_name()], 30.0)
+    self.assertAlmostEqual(mean_grad_map[w.get_name()], 68.0 / 3)
+    self.assertAlmostEqual(mean_grad_map[b.get_name()], 10.0)
+
+  def test_minimize_with_batch(self):
+    foo = GradientDescentOptimizer(learning_rate=0.01)
+    w = ops.VariableOp(0.0)
+    b = ops.VariableOp(0.0)
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    y = ops.PlaceholderOp(np.float64, shape=[None])
+    loss = ops.SquareOp(y - (w * x + b))
+    train_op = foo.minimize(loss)
+
+    features = np.linspace(0.0, 5.0, 100)
+    labels = 10.0 * features + 3.0
+    with Session() as sess:
+      for _ in range(3000):
+        sess.run(train_op, feed_dict={x: features, y: labels})
+    self.assertAlmostEqual(w.get_value(), 10.0, places=2)
+    self.assertAlmostEqual(b.get_value(), 3.0, places=2)
+
+  def test_minimize(self):
+    foo = GradientDescentOptimizer(learning_rate=0.1)
+    w = ops.VariableOp(1.0)
+    x = ops.PlaceholderOp(float)
+    loss = ops.SquareOp(w * x)
+    train_op = foo.minimize(loss)
+
+    with Session() as sess:
+      sess.run(train_op, feed_dict={x: 2.0})
+    # d(loss)/dw = 2 * w * x^2 = 8.0
+    self.assertAlmostEqual(w.get_value(), 1.0 - 0.1 * 8.0)
+
+  def test_minimize_with_fusion(self):
+    final_values = []
+    for do_elementwise_fusion in [False, True]:
+      graph._default_graph = graph.Graph()
+      w = ops.VariableOp(np.array([1.0, -1.0]))
+      x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      loss = ops.SquareOp(x * w - 1.0) / 2.0 + ops.CubicOp(w)
+      train_op = GradientDescentOptimizer(0.01).minimize(loss)
+
+      config = ConfigProto(do_elementwise_fusion=do_elementwise_fusion)
+      with Session(config=config) as sess:
+        for _ in range(3):
+          sess.run(train_op, feed_dict={x: [[1.0, 2.0], [3.0, 4.0]]})
+        plan = sess._get_plan([train_op], {x: None})
+      final_values.append(w.get_value())
+
+    # The gradient ops of the minimize op are fused like the forward ops
+    self.assertTrue(plan.get_slot_kernel_map())
+    self.assertIn(ops.UnbroadcastOp, [type(op) for op in plan.get_ops()])
+    np.testing.assert_allclose(final_values[1], final_values[0])
+
+  def test_minimize_embedding(self):
+    table_value = np.arange(20.0).reshape(10, 2)
+    ids_value = np.array([[1, 3], [1, 8]])
+    targets_value = np.zeros((2, 2, 2))
+
+    final_values = []
+    for is_flattened, global_jit_level in [(False, 0), (False, 1), (True, 0)]:
+      graph._default_graph = graph.Graph()
+      table = ops.VariableOp(table_value)
+      ids = ops.PlaceholderOp(np.int64, shape=[None, 2])
+      targets = ops.PlaceholderOp(np.float64, shape=[None, 2, 2])
+      loss = ops.SquareOp(ops.EmbeddingLookupOp(table, ids) - targets)
+      train_op = GradientDescentOptimizer(0.1).minimize(loss, reduction="sum")
+      if is_flattened:
+        graph.get_default_graph().flatten_trainable_variables()
+
+      config = ConfigProto(global_jit_level=global_jit_level)
+      with Session(config=config) as sess:
+        sess.run(train_op, feed_dict={ids: ids_value, targets: targets_value})
+      final_values.append(table.get_value())
+
+    # d(loss)/d(row) = 2 * row for each lookup of the row
+    expected_value = table_value.copy()
+    expected_value[[1, 3, 8]] *= [[0.6], [0.8], [0.8]]
+    for final_value in final_values:
+      np.testing.assert_allclose(final_value, expected_value)
+    np.testing.assert_array_equal(table_value, np.arange(20.0).reshape(10, 2))
+
+  def test_minimize_embedding_used_densely(self):
+    table_value = np.arange(20.0).reshape(10, 2)
+
+    final_values = []
+    for do_elementwise_fusion in [False, True]:
+      graph._default_graph = graph.Graph()
+      table = ops.VariableOp(table_value)
+      ids = ops.PlaceholderOp(np.int64, shape=[None])
+      # The looked up row is broadcast to the rows of the table
+      loss = ops.SquareOp(ops.EmbeddingLookupOp(table, ids)) + ops.SquareOp(
+          table) * 0.005
+      train_op = GradientDescentOptimizer(0.01).minimize(loss,
+                                                          reduction="sum")
+
+      config = ConfigProto(do_elementwise_fusion=do_elementwise_fusion,
+                           do_memory_planning=do_elementwise_fusion)
+      with Session(config=config) as sess:
+        for _ in range(2):
+          sess.run(train_op, feed_dict={ids: [3]})
+      final_values.append(table.get_value())
+
+    # The sparse and dense gradients are added as one dense gradient
+    expected_value = table_value * 0.9999**2
+    expected_value[3] = table_value[3] * 0.7999**2
+    for final_value in final_values:
+      self.assertEqual(final_value.dtype, np.float64)
+      np.testing.assert_allclose(final_value, expected_value)
+
+
+class SlotOptimizerTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def run_two_steps(self, optimizer, is_flattened=False):
+    """Apply the gradients twice and return the values of w and b."""
+    graph._default_graph = graph.Graph()
+    optimizer.set_graph(graph.get_default_graph())
+    w = ops.VariableOp(np.array([1.0, 2.0]))
+    b = ops.VariableOp(3.0)
+    if is_flattened:
+      graph.get_default_graph().flatten_trainable_variables()
+
+    optimizer.apply_gradients({
+        w.get_name(): np.array([0.5, -1.0]),
+        b.get_name(): 2.0
+    })
+    optimizer.apply_gradients({
+        w.get_name(): np.array([1.5, 0.0]),
+        b.get_name(): 0
+    })
+    return np.append(w.get_value(), b.get_value())
+
+  def test_adagrad(self):
+    values = self.run_two_steps(AdagradOptimizer(0.1, 0.1))
+
+    grads = np.array([[0.5, -1.0, 2.0], [1.5, 0.0, 0.0]])
+    expected_values = np.array([1.0, 2.0, 3.0])
+    accumulators = np.full(3, 0.1)
+    for grad in grads:
+      accumulators += grad**2
+      expected_values -= 0.1 * grad / np.sqrt(accumulators)
+    np.testing.assert_allclose(values, expected_values)
+
+  def test_momentum(self):
+    values = self.run_two_steps(MomentumOptimizer(0.1, 0.9))
+    # The second update is 0.1 * (0.9 * first grad + second grad)
+    np.testing.assert_allclose(values, [1.0 - 0.05 - 0.195, 2.0 + 0.1 + 0.09,
+                                        3.0 - 0.2 - 0.18])
+
+    nesterov_values = self.run_two_steps(
+        MomentumOptimizer(0.1, 0.9, use_nesterov=True))
+    np.testing.assert_allclose(nesterov_values[2], 3.0 - 0.38 - 0.162)
+
+  def test_adam(self):
+    values = self.run_two_steps(AdamOptimizer(0.1, 0.9, 0.999, 1e-8))
+
+    grads = np.array([[0.5, -1.0, 2.0], [1.5, 0.0, 0.0]])
+    expected_values = np.array([1.0, 2.0, 3.0])
+    m = np.zeros(3)
+    v = np.zeros(3)
+    for step, grad in enumerate(grads, 1):
+      m = 0.9 * m + 0.1 * grad
+      v = 0.999 * v + 0.001 * grad**2
+      expected_values -= 0.1 * (m / (1 - 0.9**step)) / (
+          np.sqrt(v / (1 - 0.999**step)) + 1e-8)
+    np.testing.assert_allclose(values, expected_values, rtol=1e-6)
+
+  def test_with_parameter_buffer(self):
+    for optimizer_class in [AdagradOptimizer, MomentumOptimizer, AdamOptimizer]:
+      values = self.run_two_steps(optimizer_class())
+      flattened_values = self.run_two_steps(optimizer_class(),
+                                            is_flattened=True)
+      np.testing.assert_allclose(flattened_values, values)
+
+  def test_minimize(self):
+    # The scales of the features differ by 100 times
+    first_features = np.linspace(-1.0, 1.0, 50)
+    second_features = np.linspace(-100.0, 100.0, 50)[::-1]
+    labels = 2.0 * first_features - 0.03 * second_features + 1.0
+
+    for optimizer in [
+        AdagradOptimizer(0.5),
+        MomentumOptimizer(0.0004, 0.9),
+        AdamOptimizer(0.1, 0.9, 0.999, 1e-8)
+    ]:
+      graph._default_graph = graph.Graph()
+      optimizer.set_graph(graph.get_default_graph())
+      first_weight = ops.VariableOp(0.0)
+      second_weight = ops.VariableOp(0.0)
+      bias = ops.VariableOp(0.0)
+      first_x = ops.PlaceholderOp(np.float64, shape=[None])
+      second_x = ops.PlaceholderOp(np.float64, shape=[None])
+      y = ops.PlaceholderOp(np.float64, shape=[None])
+      loss = ops.SquareOp(y - (first_x * first_weight +
+                               second_x * second_weight + bias))
+      train_op = optimizer.minimize(loss)
+
+      feed_dict = {
+          first_x: first_features,
+          second_x: second_features,
+          y: labels
+      }
+      with Session() as sess:
+        for _ in range(500):
+          sess.run(train_op, feed_dict=feed_dict)
+        self.assertLess(np.mean(sess.run(loss, feed_dict=feed_dict)), 0.01,
+                        optimizer.get_name())
+
+  def test_change_variables(self):
+    optimizer = MomentumOptimizer(0.1, 0.9)
+    w = ops.VariableOp(np.array([1.0, 2.0]))
+    optimizer.apply_gradients({w.get_name(): np.array([1.0, 1.0])})
+
+    # The slots are created again for the new shape
+    w.set_value(np.array([1.0, 2.0, 3.0]))
+    optimizer.apply_gradients({w.get_name(): np.array([1.0, 1.0, 1.0])})
+    np.testing.assert_allclose(w.get_value(), [0.9, 1.9, 2.9])
+
+    # The layout refers to the variables of the new graph
+    graph._default_graph = graph.Graph()
+    optimizer.set_graph(graph.get_default_graph())
+    new_w = ops.VariableOp(np.array([1.0, 2.0, 3.0]))
+    optimizer.apply_gradients({new_w.get_name(): np.array([1.0, 1.0, 1.0])})
+    np.testing.assert_allclose(new_w.get_value(), [0.9, 1.9, 2.9])
+    np.testing.assert_allclose(w.get_value(), [0.9, 1.9, 2.9])
 
 
 if __name__ == '__main__':
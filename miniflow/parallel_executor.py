@@ -0,0 +1,91 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module runs the independent steps of the plans in a thread pool."""
+
+import queue
+
+import numpy as np
+
+# The steps whose inputs have fewer elements are run on the caller thread
+INLINE_COST_THRESHOLD = 10000
+
+
+class ParallelScheduler(object):
+  """
+  The scheduler which runs the steps of one plan in a thread pool. Each step
+  counts its unfinished input steps and is scheduled once the count reaches
+  zero, so the independent branches run concurrently while NumPy releases
+  the GIL. The cheap steps, such as the scalar ops, run inline on the caller
+  thread because dispatching them to the pool costs more than computing.
+  """
+
+  def __init__(self, steps):
+    self._steps = steps
+
+    # The number of the input steps and the consumers of each step
+    slot_index_map = {slot: index for index, (slot, _, _) in enumerate(steps)}
+    self._dependency_numbers = [0] * len(steps)
+    self._consumer_indexes = [[] for _ in steps]
+    for index, (_, _, input_slots) in enumerate(steps):
+      for input_slot in set(input_slots):
+        if input_slot in slot_index_map:
+          self._dependency_numbers[index] += 1
+          self._consumer_indexes[slot_index_map[input_slot]].append(index)
+
+  def run_steps(self, values, thread_pool):
+    """Run the steps with the fed values in place."""
+    dependency_numbers = list(self._dependency_numbers)
+    ready_indexes = [
+        index for index, number in enumerate(dependency_numbers) if number == 0
+    ]
+    done_queue = queue.Queue()
+    running_number = 0
+
+    while ready_indexes or running_number > 0:
+      finished_indexes = []
+
+      # Run the ready steps in order and submit the expensive ones
+      for index in ready_indexes:
+        slot, compute, input_slots = self._steps[index]
+        input_values = [values[input_slot] for input_slot in input_slots]
+
+        if estimate_cost(input_values) < INLINE_COST_THRESHOLD:
+          values[slot] = compute(*input_values)
+          finished_indexes.append(index)
+        else:
+          future = thread_pool.submit(compute, *input_values)
+          future.add_done_callback(
+              lambda future, index=index: done_queue.put((index, future)))
+          running_number += 1
+      ready_indexes = []
+
+      if not finished_indexes:
+        index, future = done_queue.get()
+        running_number -= 1
+        values[self._steps[index][0]] = future.result()
+        finished_indexes.append(index)
+
+      for finished_index in finished_indexes:
+        for consumer_index in self._consumer_indexes[finished_index]:
+          dependency_numbers[consumer_index] -= 1
+          if dependency_numbers[consumer_index] == 0:
+            ready_indexes.append(consumer_index)
+      ready_indexes.sort()
+
+
+def estimate_cost(input_values):
+  """Return the number of the input elements as the cost of the step."""
+  return sum(
+      value.size if isinstance(value, np.ndarray) else 1
+      for value in input_values)
@@ -0,0 +1,92 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.session import Session
+
+
+class ParallelSchedulerTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_run_towers(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    towers = [ThreadRecordingSquareOp(x * float(i)) for i in range(8)]
+    total = ops.AddNOp(*towers)
+    scalar = ThreadRecordingSquareOp(ops.ConstantOp(3.0))
+
+    with Session(config=ConfigProto(inter_op_parallelism_threads=4)) as sess:
+      result = sess.run([total, scalar], feed_dict={x: np.ones(100000)})
+    np.testing.assert_array_equal(result[0], np.full(100000, 140.0))
+    self.assertEqual(result[1], 9.0)
+
+    # The towers run in the pool and the scalar op runs inline
+    for tower in towers:
+      self.assertIsNot(tower.compute_thread, threading.current_thread())
+    self.assertIs(scalar.compute_thread, threading.current_thread())
+
+  def test_raise_error(self):
+    x = ops.PlaceholderOp(np.float64, shape=[None])
+    y = ops.PlaceholderOp(np.float64, shape=[None])
+    z = ops.AddNOp(ThreadRecordingSquareOp(x), ThreadRecordingSquareOp(y))
+
+    with Session(config=ConfigProto(inter_op_parallelism_threads=2)) as sess:
+      self.assertRaises(ValueError, sess.run, z,
+                        feed_dict={x: np.ones(20000), y: np.ones(30000)})
+
+  def test_minimize(self):
+    features = np.random.rand(20000, 2)
+    labels = features * 3.0 + 1.0
+
+    final_values = []
+    for inter_op_parallelism_threads in [0, 4]:
+      graph._default_graph = graph.Graph()
+      weights = ops.VariableOp(np.zeros(2))
+      bias = ops.VariableOp(0.0)
+      x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      loss = ops.SquareOp(y - (x * weights + bias))
+      train_op = GradientDescentOptimizer(0.1).minimize(loss)
+
+      config = ConfigProto(
+          inter_op_parallelism_threads=inter_op_parallelism_threads)
+      with Session(config=config) as sess:
+        for _ in range(5):
+          sess.run(train_op, feed_dict={x: features, y: labels})
+      final_values.append([weights.get_value(), bias.get_value()])
+
+    np.testing.assert_allclose(final_values[0][0], final_values[1][0])
+    self.assertAlmostEqual(final_values[0][1], final_values[1][1])
+
+
+class ThreadRecordingSquareOp(ops.SquareOp):
+  def __init__(self, input):
+    super(ThreadRecordingSquareOp, self).__init__(input)
+    self.compute_thread = None
+
+  def compute(self, input_value):
+    self.compute_thread = threading.current_thread()
+    return super(ThreadRecordingSquareOp, self).compute(input_value)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,375 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module trains the graphs in multiple processes on one machine."""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import session
+
+
+class DataParallelTrainer(object):
+  """
+  The trainer which forks the worker processes to run the same graph on the
+  shards of the input. In each step every worker writes its gradients to the
+  shared memory, averages one chunk of the gradients of all workers and then
+  applies the averaged gradients, so the replicas stay in sync without any
+  service. The values of the variables and the state of the optimizer are
+  copied back after training.
+  """
+
+  def __init__(self, optimizer, loss, worker_number=2, reduction="mean"):
+    self._optimizer = optimizer
+    self._loss = loss
+    self._worker_number = worker_number
+    self._reduction = reduction
+    self._grad_ops = optimizer.get_gradient_ops(loss, reduction)
+
+  def get_worker_number(self):
+    return self._worker_number
+
+  def train(self, feed_dict, step_number, batch_size=None):
+    """
+    Train for the steps and return the mean loss of the last step. The values of
+    feed_dict are split along the first axis for the workers. Each step uses
+    the mini-batch of batch_size samples, or all the samples if it is None.
+    """
+    layout = _ParameterLayout(
+        self._optimizer.get_graph().get_trainable_variables_collection())
+
+    shards = _split_feed_dict(feed_dict, self._worker_number)
+    if batch_size is None:
+      local_batch_size = None
+    else:
+      local_batch_size = max(batch_size // self._worker_number, 1)
+
+    # The weighted gradients of each worker, the averaged gradients, the
+    # final parameters, the loss of each worker in the last step and the
+    # final state of the optimizer
+    shared_arrays = _SharedArrays([
+        (self._worker_number, layout.get_size() + 1),
+        (layout.get_size(),),
+        (layout.get_size(),),
+        (self._worker_number,),
+        (len(self._optimizer.get_state_slot_names()), layout.get_size()),
+        (len(self._optimizer.get_state_attributes()),),
+    ])
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(self._worker_number)
+    processes = [
+        context.Process(
+            target=self._run_worker,
+            args=(worker_index, shards[worker_index], step_number,
+                  local_batch_size, layout, shared_arrays, barrier))
+        for worker_index in range(self._worker_number)
+    ]
+
+    try:
+      for process in processes:
+        process.start()
+      for process in processes:
+        process.join()
+      if any(process.exitcode != 0 for process in processes):
+        raise RuntimeError("The worker processes of training failed")
+
+      (grads, _, parameters, losses, state_slots,
+       state_attributes) = shared_arrays.get_arrays()
+      layout.set_values(parameters)
+      if step_number > 0:
+        # Continue from the optimizer state of the workers in the next call
+        for slot, state_slot in zip(self._optimizer.get_state_slots(),
+                                    state_slots):
+          slot[...] = state_slot
+        self._optimizer.set_state_attributes(state_attributes)
+      loss_value = float(np.dot(grads[:, 0], losses) / np.sum(grads[:, 0]))
+
+      # The shared memory cannot be released with the arrays referred
+      del grads, parameters, losses, state_slots, state_attributes
+      return loss_value
+    finally:
+      shared_arrays.release()
+
+  def _run_worker(self, worker_index, shard, step_number, local_batch_size,
+                  layout, shared_arrays, barrier):
+    """Run the training steps in the forked worker process."""
+    (grads, averaged_grads, parameters, losses, state_slots,
+     state_attributes) = shared_arrays.get_arrays()
+
+    # Average the columns of this chunk in the all-reduce
+    chunk_size = -(-layout.get_size() // self._worker_number)
+    chunk_start = min(worker_index * chunk_size, layout.get_size())
+    chunk_end = min(chunk_start + chunk_size, layout.get_size())
+
+    try:
+      sess = session.Session()
+      for step_index in range(step_number):
+        batch_feed_dict, sample_number = _get_batch(shard, step_index,
+                                                    local_batch_size)
+        variablename_grad_map, loss_value = sess.run(
+            [self._grad_ops, self._loss], feed_dict=batch_feed_dict)
+        grads[worker_index, 0] = sample_number
+        grads[worker_index, 1:] = layout.flatten(variablename_grad_map)
+        barrier.wait()
+
+        # Reduce-scatter the sum or the weighted mean of the gradients
+        chunk_grads = grads[:, 1 + chunk_start:1 + chunk_end]
+        if self._reduction == "sum":
+          averaged_grads[chunk_start:chunk_end] = np.sum(chunk_grads, axis=0)
+        else:
+          weights = grads[:, 0]
+          averaged_grads[chunk_start:chunk_end] = np.dot(
+              weights, chunk_grads) / np.sum(weights)
+        barrier.wait()
+
+        self._optimizer.apply_gradients(layout.unflatten(averaged_grads))
+        losses[worker_index] = np.mean(loss_value)
+
+      if worker_index == 0:
+        parameters[:] = layout.get_values()
+        # The optimizers of the workers have the same state
+        if step_number > 0:
+          for state_slot, slot in zip(state_slots,
+                                      self._optimizer.get_state_slots()):
+            state_slot[...] = slot
+          state_attributes[:] = self._optimizer.get_state_attributes()
+    except BaseException:
+      # Wake up the other workers instead of waiting forever
+      barrier.abort()
+      raise
+
+
+class HogwildTrainer(object):
+  """
+  The trainer which runs asynchronous SGD without locks. The values of the
+  trainable variables are mapped to the shared memory before forking, and
+  each worker runs the minimize op on its shard and updates the variables in
+  place. The staleness of one update is the number of the updates by other
+  workers between reading the variables and applying the update.
+  """
+
+  def __init__(self, optimizer, loss, worker_number=2, reduction="mean"):
+    self._optimizer = optimizer
+    self._loss = loss
+    self._worker_number = worker_number
+    self._minimize_op = optimizer.minimize(loss, reduction=reduction)
+
+    # The statistics of the last training
+    self._steps_per_second = 0.0
+    self._mean_staleness = 0.0
+    self._max_staleness = 0
+
+  def get_worker_number(self):
+    return self._worker_number
+
+  def get_steps_per_second(self):
+    return self._steps_per_second
+
+  def get_mean_staleness(self):
+    return self._mean_staleness
+
+  def get_max_staleness(self):
+    return self._max_staleness
+
+  def train(self, feed_dict, step_number, batch_size=None):
+    """
+    Train for the steps in each worker and return the mean loss of the last
+    steps. The values of feed_dict are split along the first axis for the
+    workers and each step uses the mini-batch of batch_size samples.
+    """
+    variables = list(self._optimizer.get_graph()
+                     .get_trainable_variables_collection().values())
+    values = [np.asarray(variable.get_value()) for variable in variables]
+
+    # The variables, the update numbers, the sums and the maximums of the
+    # staleness and the last losses of the workers. The integer variables
+    # are stored as float64 so that the updates are not truncated
+    shared_arrays = _SharedArrays(
+        [value.shape for value in values] + [(self._worker_number,)] * 4,
+        [_get_float_dtype(value) for value in values] +
+        [np.int64, np.int64, np.int64, np.float64])
+    arrays = shared_arrays.get_arrays()
+    for variable, value, array in zip(variables, values, arrays):
+      array[...] = value
+      variable.set_in_place_value(array)
+
+    shards = _split_feed_dict(feed_dict, self._worker_number)
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(
+            target=self._run_worker,
+            args=(worker_index, shards[worker_index], step_number, batch_size,
+                  arrays[len(variables):]))
+        for worker_index in range(self._worker_number)
+    ]
+
+    try:
+      start_time = time.time()
+      for process in processes:
+        process.start()
+      for process in processes:
+        process.join()
+      end_time = time.time()
+      if any(process.exitcode != 0 for process in processes):
+        raise RuntimeError("The worker processes of training failed")
+
+      update_numbers, staleness_sums, staleness_maxes, losses = arrays[
+          len(variables):]
+      total_step_number = int(np.sum(update_numbers))
+      self._steps_per_second = total_step_number / (end_time - start_time)
+      self._mean_staleness = float(
+          np.sum(staleness_sums)) / max(total_step_number, 1)
+      self._max_staleness = int(np.max(staleness_maxes))
+      return float(np.mean(losses))
+    finally:
+      # Copy the values out of the shared memory before releasing it
+      for variable, array in zip(variables, arrays):
+        variable.set_value(array.copy() if array.ndim > 0 else array[()])
+      del arrays
+      shared_arrays.release()
+
+  def _run_worker(self, worker_index, shard, step_number, batch_size,
+                  statistics_arrays):
+    """Run the training steps in the forked worker process."""
+    update_numbers, staleness_sums, staleness_maxes, losses = (
+        statistics_arrays)
+
+    sess = session.Session()
+    for step_index in range(step_number):
+      batch_feed_dict, _ = _get_batch(shard, step_index, batch_size)
+
+      # The other workers may update the variables during this step
+      read_update_number = np.sum(update_numbers)
+      _, loss_value = sess.run([self._minimize_op, self._loss],
+                               feed_dict=batch_feed_dict)
+      staleness = np.sum(update_numbers) - read_update_number
+      update_numbers[worker_index] += 1
+
+      staleness_sums[worker_index] += staleness
+      staleness_maxes[worker_index] = max(staleness_maxes[worker_index],
+                                          staleness)
+      losses[worker_index] = np.mean(loss_value)
+
+
+class _ParameterLayout(object):
+  """The offsets of the trainable variables in the flat arrays."""
+
+  def __init__(self, variablename_variable_map):
+    # Example: [("w", VariableOp, 0, (2, 3), np.float32)]
+    self._items = []
+    offset = 0
+    for variable_name, variable in variablename_variable_map.items():
+      value = variable.get_value()
+      self._items.append((variable_name, variable, offset, np.shape(value),
+                          _get_float_dtype(value)))
+      offset += int(np.size(value))
+    self._size = offset
+
+  def get_size(self):
+    return self._size
+
+  def flatten(self, variablename_value_map):
+    flat_values = np.zeros(self._size)
+    for variable_name, _, offset, shape, _ in self._items:
+      size = int(np.prod(shape))
+      flat_values[offset:offset + size] = np.broadcast_to(
+          variablename_value_map[variable_name], shape).ravel()
+    return flat_values
+
+  def unflatten(self, flat_values):
+    variablename_value_map = {}
+    for variable_name, _, offset, shape, dtype in self._items:
+      size = int(np.prod(shape))
+      value = flat_values[offset:offset + size].reshape(shape).astype(dtype)
+      variablename_value_map[variable_name] = value[()] if shape == (
+      ) else value
+    return variablename_value_map
+
+  def get_values(self):
+    return self.flatten({
+        variable_name: variable.get_value()
+        for variable_name, variable, _, _, _ in self._items
+    })
+
+  def set_values(self, flat_values):
+    variablename_value_map = self.unflatten(flat_values)
+    for variable_name, variable, _, _, _ in self._items:
+      variable.set_value(variablename_value_map[variable_name])
+
+
+class _SharedArrays(object):
+  """The arrays in one block of shared memory which is mapped by forking."""
+
+  def __init__(self, shapes, dtypes=None):
+    if dtypes is None:
+      dtypes = [np.float64] * len(shapes)
+    self._shapes = shapes
+    self._dtypes = [np.dtype(dtype) for dtype in dtypes]
+
+    # Align every array to 8 bytes
+    self._offsets = []
+    size = 0
+    for shape, dtype in zip(self._shapes, self._dtypes):
+      self._offsets.append(size)
+      size += -(-int(np.prod(shape)) * dtype.itemsize // 8) * 8
+    self._shared_memory = shared_memory.SharedMemory(create=True,
+                                                     size=max(size, 1))
+
+  def get_arrays(self):
+    return [
+        np.ndarray(shape, dtype=dtype, buffer=self._shared_memory.buf,
+                   offset=offset)
+        for shape, dtype, offset in zip(self._shapes, self._dtypes,
+                                        self._offsets)
+    ]
+
+  def release(self):
+    self._shared_memory.close()
+    self._shared_memory.unlink()
+
+
+def _get_float_dtype(value):
+  """Return the dtype of the value, or float64 for the integer values."""
+  dtype = np.result_type(value)
+  if np.issubdtype(dtype, np.floating):
+    return dtype
+  return np.dtype(np.float64)
+
+
+def _split_feed_dict(feed_dict, worker_number):
+  """Split the fed arrays along the first axis for each worker."""
+  shards = [{} for _ in range(worker_number)]
+  for feed_key, value in feed_dict.items():
+    for shard, value_shard in zip(shards,
+                                  np.array_split(np.asarray(value),
+                                                 worker_number)):
+      shard[feed_key] = value_shard
+  return shards
+
+
+def _get_batch(shard, step_index, batch_size):
+  """Return the mini-batch of the step in the shard and its sample number."""
+  sample_number = min(len(value) for value in shard.values())
+  if batch_size is None or batch_size >= sample_number:
+    return shard, sample_number
+
+  start = (step_index * batch_size) % sample_number
+  indexes = np.arange(start, start + batch_size) % sample_number
+  return {
+      feed_key: value[indexes]
+      for feed_key, value in shard.items()
+  }, batch_size
@@ -0,0 +1,179 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.optimizer import AdagradOptimizer
+from miniflow.optimizer import AdamOptimizer
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.parallel_trainer import DataParallelTrainer
+from miniflow.parallel_trainer import HogwildTrainer
+from miniflow.session import Session
+
+
+class DataParallelTrainerTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def build_model(self):
+    weights = ops.VariableOp(np.zeros(2))
+    bias = ops.VariableOp(0.0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    return weights, bias, x, y, loss
+
+  def test_train(self):
+    features = np.arange(14.0).reshape(7, 2) / 10.0
+    labels = features * [1.0, 2.0] + 0.5
+
+    # Train with one process on all the samples
+    weights, bias, x, y, loss = self.build_model()
+    train_op = GradientDescentOptimizer(0.1).minimize(loss)
+    sess = Session()
+    for _ in range(20):
+      _, loss_value = sess.run([train_op, loss],
+                               feed_dict={x: features, y: labels})
+    expected_values = [weights.get_value(), bias.get_value()]
+
+    graph._default_graph = graph.Graph()
+    weights, bias, x, y, loss = self.build_model()
+    trainer = DataParallelTrainer(GradientDescentOptimizer(0.1), loss,
+                                  worker_number=3)
+    last_loss = trainer.train({x: features, y: labels}, 20)
+
+    # The shards are weighted by their sample numbers
+    np.testing.assert_allclose(weights.get_value(), expected_values[0])
+    self.assertAlmostEqual(bias.get_value(), expected_values[1])
+    self.assertAlmostEqual(last_loss, np.mean(loss_value))
+
+  def test_train_sum(self):
+    features = np.arange(14.0).reshape(7, 2) / 10.0
+    labels = features * [1.0, 2.0] + 0.5
+
+    # The integer variable is trained like the float variables
+    weights = ops.VariableOp(np.zeros(2))
+    bias = ops.VariableOp(0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    train_op = GradientDescentOptimizer(0.01).minimize(loss, reduction="sum")
+    sess = Session()
+    for _ in range(5):
+      sess.run(train_op, feed_dict={x: features, y: labels})
+    expected_values = [weights.get_value(), bias.get_value()]
+
+    graph._default_graph = graph.Graph()
+    weights = ops.VariableOp(np.zeros(2))
+    bias = ops.VariableOp(0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    trainer = DataParallelTrainer(GradientDescentOptimizer(0.01), loss,
+                                  worker_number=2, reduction="sum")
+    trainer.train({x: features, y: labels}, 5)
+
+    # The gradients of the shards are added without averaging
+    np.testing.assert_allclose(weights.get_value(), expected_values[0])
+    self.assertAlmostEqual(bias.get_value(), expected_values[1])
+    self.assertNotEqual(bias.get_value(), 0)
+
+  def test_train_with_optimizer_state(self):
+    features = np.arange(14.0).reshape(7, 2) / 10.0
+    labels = features * [1.0, 2.0] + 0.5
+
+    final_values = []
+    for optimizer_class in [AdamOptimizer, AdagradOptimizer]:
+      for call_number, step_number in [(1, 10), (10, 1)]:
+        graph._default_graph = graph.Graph()
+        weights, bias, x, y, loss = self.build_model()
+        optimizer = optimizer_class(0.1)
+        trainer = DataParallelTrainer(optimizer, loss, worker_number=2)
+        for _ in range(call_number):
+          trainer.train({x: features, y: labels}, step_number)
+        final_values.append(np.append(weights.get_value(), bias.get_value()))
+
+      # The slots and the step number continue in the next call
+      np.testing.assert_allclose(final_values[-1], final_values[-2])
+    self.assertEqual(optimizer.get_state_attributes(), [])
+
+    graph._default_graph = graph.Graph()
+    weights, bias, x, y, loss = self.build_model()
+    optimizer = AdamOptimizer(0.1)
+    DataParallelTrainer(optimizer, loss).train({x: features, y: labels}, 3)
+    self.assertEqual(optimizer.get_state_attributes(), [3])
+
+  def test_train_failed(self):
+    _, _, x, y, loss = self.build_model()
+    trainer = DataParallelTrainer(GradientDescentOptimizer(0.1), loss,
+                                  worker_number=2)
+    # The labels of the wrong shape fail in the workers
+    self.assertRaises(RuntimeError, trainer.train,
+                      {x: np.ones((4, 2)), y: np.ones((4, 3))}, 1)
+
+
+class HogwildTrainerTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_train(self):
+    features = np.random.rand(1000, 2).astype(np.float32)
+    labels = features * [1.0, 2.0] + 0.5
+
+    weights = ops.VariableOp(np.zeros(2, np.float32))
+    bias = ops.VariableOp(np.float32(0.0))
+    x = ops.PlaceholderOp(np.float32, shape=[None, 2])
+    y = ops.PlaceholderOp(np.float32, shape=[None, 2])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    trainer = HogwildTrainer(GradientDescentOptimizer(0.1), loss,
+                             worker_number=3)
+    last_loss = trainer.train({x: features, y: labels}, 300, batch_size=10)
+
+    self.assertLess(last_loss, 0.01)
+    np.testing.assert_allclose(weights.get_value(), [1.0, 2.0], atol=0.1)
+    self.assertAlmostEqual(bias.get_value(), 0.5, delta=0.1)
+
+    # The values are copied out of the shared memory after training
+    self.assertFalse(weights.is_in_place())
+    self.assertEqual(weights.get_value().dtype, np.float32)
+    self.assertIsInstance(bias.get_value(), np.float32)
+
+    self.assertGreater(trainer.get_steps_per_second(), 0.0)
+    self.assertGreaterEqual(trainer.get_mean_staleness(), 0.0)
+    self.assertGreaterEqual(trainer.get_max_staleness(),
+                            trainer.get_mean_staleness())
+
+  def test_train_integer_variables(self):
+    features = np.random.rand(1000, 1)
+    labels = features * 2.0 + 1.0
+
+    weights = ops.VariableOp(1)
+    bias = ops.VariableOp(0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 1])
+    y = ops.PlaceholderOp(np.float64, shape=[None, 1])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    trainer = HogwildTrainer(GradientDescentOptimizer(0.1), loss,
+                             worker_number=2)
+    trainer.train({x: features, y: labels}, 200, batch_size=10)
+
+    self.assertAlmostEqual(weights.get_value(), 2.0, delta=0.2)
+    self.assertAlmostEqual(bias.get_value(), 1.0, delta=0.2)
+
+
+if __name__ == '__main__':
+  unittest.main()
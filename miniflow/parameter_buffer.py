@@ -0,0 +1,113 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module stores the trainable variables in one contiguous array."""
+
+import numpy as np
+
+from . import ops
+
+
+class ParameterBuffer(object):
+  """
+  The flat parameter array whose views are the values of the variables and
+  the flat gradient array of the same layout. The variables are updated in
+  place, so one update of the parameter array updates all of them, and the
+  model can be saved or reduced as one array.
+  """
+
+  def __init__(self, variablename_variable_map, dtype=np.float64):
+    # Example: [("w", VariableOp, 0, (2, 3))]
+    layout = []
+    offset = 0
+    for variable_name, variable in variablename_variable_map.items():
+      shape = np.shape(variable.get_value())
+      layout.append((variable_name, variable, offset, shape))
+      offset += int(np.prod(shape))
+
+    self._dtype = np.dtype(dtype)
+    self._parameters = np.empty(offset, dtype=self._dtype)
+    self._grads = np.zeros(offset, dtype=self._dtype)
+
+    # The scaled gradients of axpy() which are allocated once when used
+    self._update = None
+
+    # Example: [("w", VariableOp, parameter_view, grad_view)]
+    self._items = []
+    for variable_name, variable, offset, shape in layout:
+      size = int(np.prod(shape))
+      parameter_view = self._parameters[offset:offset + size].reshape(shape)
+      grad_view = self._grads[offset:offset + size].reshape(shape)
+      parameter_view[...] = variable.get_value()
+      variable.set_in_place_value(parameter_view)
+      self._items.append((variable_name, variable, parameter_view, grad_view))
+
+  def get_size(self):
+    return len(self._parameters)
+
+  def get_dtype(self):
+    return self._dtype
+
+  def get_variable_names(self):
+    return [variable_name for variable_name, _, _, _ in self._items]
+
+  def get_parameters(self):
+    return self._parameters
+
+  def set_parameters(self, flat_parameters):
+    """Copy the flat parameters, such as a checkpoint, into the buffer."""
+    self._parameters[...] = flat_parameters
+
+  def get_grads(self):
+    return self._grads
+
+  def is_attached(self):
+    """
+    Return whether the buffer can update the variables, which is false if
+    any variable is updated in place on another array, such as the shared
+    memory of HogwildTrainer.
+    """
+    for _, variable, parameter_view, _ in self._items:
+      if variable.is_in_place() and variable.get_value() is not parameter_view:
+        return False
+    return True
+
+  def gather_grads(self, variablename_grad_map, scale=1.0):
+    """
+    Copy the gradients of the variables times the scale into the flat
+    gradient array. The variables whose values are replaced by set_value()
+    are attached again.
+    """
+    for variable_name, variable, parameter_view, grad_view in self._items:
+      if not variable.is_in_place():
+        parameter_view[...] = variable.get_value()
+        variable.set_in_place_value(parameter_view)
+      grad = variablename_grad_map[variable_name]
+      if isinstance(grad, ops.IndexedSlices):
+        # The flat update is dense, so the sparse rows are scattered
+        grad_view.fill(0)
+        np.add.at(grad_view, grad.get_indices(), grad.get_values() * scale)
+      elif scale == 1.0:
+        np.copyto(grad_view, grad)
+      else:
+        np.multiply(grad, scale, out=grad_view)
+
+  def axpy(self, alpha):
+    """Add alpha times the flat gradients to the parameters in place."""
+    if alpha == 1.0:
+      np.add(self._parameters, self._grads, out=self._parameters)
+    else:
+      if self._update is None:
+        self._update = np.empty_like(self._grads)
+      np.multiply(self._grads, alpha, out=self._update)
+      np.add(self._parameters, self._update, out=self._parameters)
@@ -0,0 +1,133 @@
+# Copyright 2017 The Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from miniflow import graph
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.optimizer import GradientDescentOptimizer
+from miniflow.parallel_trainer import HogwildTrainer
+from miniflow.session import Session
+
+
+class ParameterBufferTest(unittest.TestCase):
+  def setUp(self):
+    graph._default_graph = graph.Graph()
+
+  def test_flatten_trainable_variables(self):
+    weights = ops.VariableOp(np.array([[1.0, 2.0], [3.0, 4.0]]))
+    bias = ops.VariableOp(5.0)
+    ops.VariableOp(6.0, is_trainable=False)
+
+    parameter_buffer = graph.get_default_graph().flatten_trainable_variables()
+    np.testing.assert_array_equal(parameter_buffer.get_parameters(),
+                                  [1.0, 2.0, 3.0, 4.0, 5.0])
+    self.assertEqual(parameter_buffer.get_variable_names(),
+                     [weights.get_name(), bias.get_name()])
+
+    # The variables are the views of the parameters
+    parameter_buffer.set_parameters(np.arange(5.0))
+    np.testing.assert_array_equal(weights.get_value(), [[0.0, 1.0],
+                                                        [2.0, 3.0]])
+    self.assertEqual(bias.get_value(), 4.0)
+
+    # The variable is attached again after its value is replaced
+    bias.set_value(7.0)
+    parameter_buffer.gather_grads({
+        weights.get_name(): 1.0,
+        bias.get_name(): 2.0
+    })
+    parameter_buffer.axpy(-0.5)
+    np.testing.assert_array_equal(parameter_buffer.get_parameters(),
+                                  [-0.5, 0.5, 1.5, 2.5, 6.0])
+    self.assertEqual(bias.get_value(), 6.0)
+
+    ops.VariableOp(8.0)
+    self.assertIsNone(graph.get_default_graph().get_parameter_buffer())
+
+  def test_minimize(self):
+    features = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    labels = np.array([[3.0, 5.0], [7.0, 9.0], [11.0, 13.0]])
+
+    final_values = []
+    for is_flattened, global_jit_level in [(False, 0), (True, 0), (True, 1)]:
+      graph._default_graph = graph.Graph()
+      weights = ops.VariableOp(np.zeros(2))
+      bias = ops.VariableOp(0.0)
+      x = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      y = ops.PlaceholderOp(np.float64, shape=[None, 2])
+      loss = ops.SquareOp(y - (x * weights + bias))
+      train_op = GradientDescentOptimizer(0.01).minimize(loss)
+      if is_flattened:
+        graph.get_default_graph().flatten_trainable_variables()
+
+      sess = Session(config=ConfigProto(global_jit_level=global_jit_level))
+      for _ in range(20):
+        sess.run(train_op, feed_dict={x: features, y: labels})
+      final_values.append(
+          np.append(weights.get_value(), bias.get_value()))
+
+    np.testing.assert_allclose(final_values[1], final_values[0])
+    np.testing.assert_allclose(final_values[2], final_values[0])
+
+  def test_fetch_then_train(self):
+    weights = ops.VariableOp(np.array([1.0, 2.0]))
+    table = ops.VariableOp(np.ones((3, 2)))
+    ids = ops.PlaceholderOp(np.int64, shape=[None])
+    loss = ops.SquareOp(weights) + ops.SquareOp(
+        ops.EmbeddingLookupOp(table, ids))
+    train_op = GradientDescentOptimizer(0.1).minimize(loss)
+    graph.get_default_graph().flatten_trainable_variables()
+
+    for global_jit_level in [0, 1]:
+      sess = Session(config=ConfigProto(global_jit_level=global_jit_level))
+      weights_value, table_value = sess.run([weights, table])
+      expected_values = [weights_value.copy(), table_value.copy()]
+      sess.run(train_op, feed_dict={ids: [1]})
+
+      # The fetched values are not the arrays updated in place
+      np.testing.assert_array_equal(weights_value, expected_values[0])
+      np.testing.assert_array_equal(table_value, expected_values[1])
+      self.assertFalse(np.array_equal(weights.get_value(), weights_value))
+
+  def test_hogwild_trainer(self):
+    features = np.random.rand(1000, 1)
+    labels = features * 2.0 + 1.0
+
+    weights = ops.VariableOp(0.0)
+    bias = ops.VariableOp(0.0)
+    x = ops.PlaceholderOp(np.float64, shape=[None, 1])
+    y = ops.PlaceholderOp(np.float64, shape=[None, 1])
+    loss = ops.SquareOp(y - (x * weights + bias))
+    optimizer = GradientDescentOptimizer(0.1)
+    trainer = HogwildTrainer(optimizer, loss, worker_number=2)
+    parameter_buffer = graph.get_default_graph().flatten_trainable_variables()
+
+    # The workers update the shared memory instead of the buffer
+    trainer.train({x: features, y: labels}, 200, batch_size=10)
+    self.assertAlmostEqual(weights.get_value(), 2.0, delta=0.2)
+    self.assertAlmostEqual(bias.get_value(), 1.0, delta=0.2)
+
+    # The variables are attached to the buffer again after training
+    optimizer.apply_gradients({weights.get_name(): 1.0, bias.get_name(): 1.0})
+    self.assertTrue(parameter_buffer.is_attached())
+    np.testing.assert_allclose(parameter_buffer.get_parameters(),
+                               [weights.get_value(), bias.get_value()])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -12,37 +12,225 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+from concurrent import futures
+
+import numpy as np
+
+from . import config as config_lib
+from . import executor
+from . import forward_mode
+from . import graph
+from . import graph_transforms
+from . import jit
 from . import ops
 
+# The plans with the lower estimated cost are run on the event loop thread
+ASYNC_INLINE_COST_THRESHOLD = 10000
+
 
 class Session(object):
   """The session to run specified op from specified graph."""
 
-  def __init__(self):
-    pass
+  def __init__(self, config=None):
+    self._graph = graph.get_default_graph()
+
+    if config is None:
+      config = config_lib.ConfigProto()
+    self._config = config
+
+    # The compiled execution plans keyed by the fetch op and feed keys
+    self._plan_cache = {}
+
+    # The thread pool of the independent ops which is created when used
+    self._thread_pool = None
+
+    # The tangent placeholders and ops keyed by the fetch ops and inputs
+    self._tangents_cache = {}
 
   def __enter__(self):
     """Support with statement."""
     return self
 
   def __exit__(self, type, value, trace):
-    pass
+    self.close()
+
+  def close(self):
+    """Release the threads of this session."""
+    if self._thread_pool is not None:
+      self._thread_pool.shutdown()
+      self._thread_pool = None
+
+  def get_graph(self):
+    return self._graph
+
+  def run(self, fetches, feed_dict=None, options=None, run_metadata=None):
+    """
+    Run the fetches which may be one op or the nested lists, tuples and dicts
+    of ops. All the ops are evaluated in one pass and the results have the
+    same structure as the fetches. Only the ancestors of the fetches are
+    evaluated, so the other placeholders do not need to be fed.
+    """
+    if isinstance(fetches, ops.Op):
+      fetch_ops = [fetches]
+    else:
+      fetch_ops = []
+      _flatten_fetches(fetches, fetch_ops)
+
+    plan = self._get_plan(fetch_ops, feed_dict)
+    results = plan.run(feed_dict, self._get_thread_pool())
+    return self._finish_run(fetches, plan, results, run_metadata)
+
+  async def run_async(self,
+                      fetches,
+                      feed_dict=None,
+                      options=None,
+                      run_metadata=None):
+    """
+    Run the fetches like run() in the coroutine. The plan is resolved on the
+    event loop thread and shared by all the requests, while the fed values
+    stay in each run. The cheap plans run inline and the others run in the
+    default executor of the loop, so the event loop is not blocked.
+    """
+    if isinstance(fetches, ops.Op):
+      fetch_ops = [fetches]
+    else:
+      fetch_ops = []
+      _flatten_fetches(fetches, fetch_ops)
+
+    plan = self._get_plan(fetch_ops, feed_dict)
+    if plan.estimate_cost(feed_dict) < ASYNC_INLINE_COST_THRESHOLD:
+      results = plan.run(feed_dict, self._get_thread_pool())
+    else:
+      # The inter-op thread pool is not used as the executor because the
+      # plan waits for its own steps in that pool
+      results = await asyncio.get_running_loop().run_in_executor(
+          None, plan.run, feed_dict, self._get_thread_pool())
+    return self._finish_run(fetches, plan, results, run_metadata)
+
+  def jvp(self, fetches, tangents, feed_dict=None):
+    """
+    Run the fetches and their Jacobian-vector products for the tangents,
+    which map the input ops or their names to the tangent values, in one
+    forward sweep. Return the values and the tangents with the same
+    structure as the fetches. The tangent ops are built once and run by the
+    same execution plans as run(), so they are pruned, fused and compiled
+    like other ops.
+    """
+    if isinstance(fetches, ops.Op):
+      fetch_ops = [fetches]
+    else:
+      fetch_ops = []
+      _flatten_fetches(fetches, fetch_ops)
+    fetch_ops = [self._graph.get_replacement(op) for op in fetch_ops]
+    # The inputs may be given by the names like the feed keys
+    name_op_map = self._graph.get_name_op_map()
+    input_ops = [
+        self._graph.get_replacement(
+            name_op_map[input_op] if isinstance(input_op, str) else input_op)
+        for input_op in tangents.keys()
+    ]
+
+    tangents_key = (tuple(fetch_ops), tuple(input_ops))
+    if tangents_key not in self._tangents_cache:
+      self._tangents_cache[tangents_key] = forward_mode.build_tangents(
+          fetch_ops, input_ops)
+    tangent_placeholders, tangent_ops = self._tangents_cache[tangents_key]
+
+    run_feed_dict = dict(feed_dict) if feed_dict else {}
+    run_feed_dict.update(zip(tangent_placeholders, tangents.values()))
+    run_ops = fetch_ops + [
+        tangent_op for tangent_op in tangent_ops if tangent_op is not None
+    ]
+    plan = self._get_plan(run_ops, run_feed_dict)
+    results = plan.run(run_feed_dict, self._get_thread_pool())
+
+    values = results[:len(fetch_ops)]
+    tangent_results = iter(results[len(fetch_ops):])
+    tangent_values = []
+    for value, tangent_op in zip(values, tangent_ops):
+      if tangent_op is None:
+        tangent_values.append(np.zeros(np.shape(value)))
+      else:
+        tangent_value = next(tangent_results)
+        if np.shape(tangent_value) != np.shape(value):
+          # The tangents of the broadcast inputs are broadcast at last
+          tangent_value = np.broadcast_to(tangent_value,
+                                          np.shape(value)).copy()
+        tangent_values.append(tangent_value)
+
+    if isinstance(fetches, ops.Op):
+      return values[0], tangent_values[0]
+    return (_pack_results(fetches, iter(values)),
+            _pack_results(fetches, iter(tangent_values)))
+
+  def _finish_run(self, fetches, plan, results, run_metadata):
+    """Fill the metadata and pack the results like the fetches."""
+    if run_metadata is not None:
+      run_metadata.executed_op_number = plan.get_executed_op_number()
+      run_metadata.pruned_op_number = plan.get_pruned_op_number()
+      run_metadata.peak_arena_size = plan.get_peak_arena_size()
+
+    if isinstance(fetches, ops.Op):
+      return results[0]
+    return _pack_results(fetches, iter(results))
+
+  def _get_plan(self, fetch_ops, feed_dict):
+    if feed_dict:
+      plan_key = (tuple(fetch_ops), frozenset(feed_dict.keys()))
+    else:
+      plan_key = (tuple(fetch_ops), frozenset())
+
+    plan = self._plan_cache.get(plan_key)
+
+    # Compile the plan again if the graph has been changed
+    if plan is None or plan.get_graph_version() != self._graph.get_version():
+      if self._config.do_constant_folding:
+        graph_transforms.fold_constants(self._graph, fetch_ops)
+      if self._config.do_common_subexpression_elimination:
+        graph_transforms.eliminate_common_subexpressions(self._graph)
+      if self._config.global_jit_level > 0:
+        plan = jit.JitExecutionPlan(fetch_ops, plan_key[1], self._graph,
+                                    self._config)
+      else:
+        plan = executor.ExecutionPlan(fetch_ops, plan_key[1], self._graph,
+                                      self._config)
+      self._plan_cache[plan_key] = plan
+
+    return plan
+
+  def _get_thread_pool(self):
+    if self._config.inter_op_parallelism_threads <= 1:
+      return None
 
-  def run(self, op, feed_dict=None, options=None):
+    if self._thread_pool is None:
+      self._thread_pool = futures.ThreadPoolExecutor(
+          self._config.inter_op_parallelism_threads)
+    return self._thread_pool
 
-    # Update the value of PlaceholerOp with feed_dict data
-    name_op_map = op._graph.get_name_op_map()
 
-    if feed_dict != None:
-      # Example: {"Placeholer_1": 10} or {PlaceholderOp: 10}
-      for op_or_opname, value in feed_dict.items():
-        if isinstance(op_or_opname, str):
-          placeholder_op = name_op_map[op_or_opname]
-        else:
-          placeholder_op = op_or_opname
+def _flatten_fetches(fetches, fetch_ops):
+  """Append the ops of the nested fetches to the list in order."""
+  if isinstance(fetches, (list, tuple)):
+    for fetch in fetches:
+      _flatten_fetches(fetch, fetch_ops)
+  elif isinstance(fetches, dict):
+    for fetch in fetches.values():
+      _flatten_fetches(fetch, fetch_ops)
+  else:
+    fetch_ops.append(fetches)
 
-        if isinstance(placeholder_op, ops.PlaceholderOp):
-          placeholder_op.set_value(value)
 
-    result = op.forward()
-    return result
+def _pack_results(fetches, results):
+  """Pack the flat results into the same structure as the fetches."""
+  if isinstance(fetches, list):
+    return [_pack_results(fetch, results) for fetch in fetches]
+  elif isinstance(fetches, tuple):
+    return tuple(_pack_results(fetch, results) for fetch in fetches)
+  elif isinstance(fetches, dict):
+    return {
+        key: _pack_results(fetch, results)
+        for key, fetch in fetches.items()
+    }
+  else:
+    return next(results)
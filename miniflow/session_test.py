@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import threading
 import unittest
 
-from session import Session
-import ops
+import numpy as np
+
+from miniflow import ops
+from miniflow.config import ConfigProto
+from miniflow.config import RunMetadata
+from miniflow.session import Session
 
 
 class SessionTest(unittest.TestCase):
@@ -30,7 +36,128 @@ class SessionTest(unittest.TestCase):
     self.assertEqual(foo.__class__, Session)
 
   def test_run(self):
-    pass
+    a = ops.PlaceholderOp(float)
+    b = ops.ConstantOp(32.0)
+    c = a + b
+    sess = Session()
+    self.assertEqual(sess.run(c, feed_dict={a: 10.0}), 42.0)
+    self.assertEqual(sess.run(c, feed_dict={a.get_name(): 1.0}), 33.0)
+
+  def test_run_shared_op_once(self):
+    a = ops.VariableOp(2.0)
+    shared = CountingSquareOp(a)
+    c = shared + shared * shared
+
+    with Session() as sess:
+      self.assertEqual(sess.run(c), 20.0)
+    self.assertEqual(shared.compute_count, 1)
+
+  def test_run_reuse_plan(self):
+    a = ops.PlaceholderOp(float)
+    c = a * 2.0
+    sess = Session()
+    self.assertEqual(sess.run(c, feed_dict={a: 1.0}), 2.0)
+    plan = sess._get_plan([c], {a: 1.0})
+    self.assertEqual(sess.run(c, feed_dict={a: 3.0}), 6.0)
+    self.assertIs(sess._get_plan([c], {a: 3.0}), plan)
+
+    # Changing the graph invalidates the compiled plan
+    ops.ConstantOp(1.0)
+    self.assertIsNot(sess._get_plan([c], {a: 3.0}), plan)
+    self.assertEqual(sess.run(c, feed_dict={a: 4.0}), 8.0)
+
+  def test_run_nested_fetches(self):
+    a = ops.PlaceholderOp(float)
+    shared = CountingSquareOp(a)
+    b = shared + 1.0
+    c = shared * 2.0
+
+    sess = Session()
+    result = sess.run({"b": b, "others": [c, (shared, a)]}, feed_dict={a: 3.0})
+    self.assertEqual(result, {"b": 10.0, "others": [18.0, (9.0, 3.0)]})
+    self.assertEqual(shared.compute_count, 1)
+
+  def test_run_with_constant_folding(self):
+    a = ops.PlaceholderOp(float)
+    b = CountingSquareOp(ops.ConstantOp(3.0))
+    c = a + b
+
+    sess = Session(config=ConfigProto(do_constant_folding=True))
+    self.assertEqual(sess.run(c, feed_dict={a: 1.0}), 10.0)
+    self.assertEqual(sess.run(c, feed_dict={a: 2.0}), 11.0)
+    self.assertEqual(b.compute_count, 1)
+
+  def test_run_pruned_placeholders(self):
+    a = ops.PlaceholderOp(float)
+    b = ops.PlaceholderOp(float)
+    first_head = a * 2.0
+    second_head = b * 3.0 + first_head
+
+    sess = Session()
+    run_metadata = RunMetadata()
+    self.assertEqual(
+        sess.run(first_head, feed_dict={a: 1.0}, run_metadata=run_metadata),
+        2.0)
+    self.assertEqual(run_metadata.executed_op_number, 2)
+    self.assertTrue(run_metadata.pruned_op_number >= 4)
+
+    with self.assertRaises(ValueError):
+      sess.run(second_head, feed_dict={a: 1.0})
+
+  def test_run_async(self):
+    a = ops.PlaceholderOp(float)
+    c = a * 2.0 + 1.0
+    sess = Session()
+
+    async def run_requests():
+      return await asyncio.gather(*[
+          sess.run_async(c, feed_dict={a: float(index)})
+          for index in range(1000)
+      ])
+
+    results = asyncio.run(run_requests())
+    self.assertEqual(results, [index * 2.0 + 1.0 for index in range(1000)])
+    self.assertEqual(len(sess._plan_cache), 1)
+
+  def test_run_async_in_executor(self):
+    a = ops.PlaceholderOp(float)
+    b = ThreadRecordingSquareOp(a)
+    c = b + 1.0
+    values = [np.full(100000, index, dtype=np.float64) for index in range(8)]
+
+    # The memory planner serializes the runs which share its buffers
+    sess = Session(config=ConfigProto(do_memory_planning=True))
+
+    async def run_requests():
+      return await asyncio.gather(*[
+          sess.run_async([b, c], feed_dict={a: value}) for value in values
+      ])
+
+    results = asyncio.run(run_requests())
+    for value, (square, result) in zip(values, results):
+      np.testing.assert_array_equal(square, value**2)
+      np.testing.assert_array_equal(result, value**2 + 1.0)
+    self.assertNotIn(threading.get_ident(), b.thread_idents)
+
+
+class CountingSquareOp(ops.SquareOp):
+  def __init__(self, input):
+    super(CountingSquareOp, self).__init__(input)
+    self.compute_count = 0
+
+  def compute(self, input_value):
+    self.compute_count += 1
+    return super(CountingSquareOp, self).compute(input_value)
+
+
+class ThreadRecordingSquareOp(ops.SquareOp):
+  def __init__(self, input):
+    super(ThreadRecordingSquareOp, self).__init__(input)
+    self.thread_idents = set()
+
+  def compute(self, input_value):
+    self.thread_idents.add(threading.get_ident())
+    return super(ThreadRecordingSquareOp, self).compute(input_value)
 
 
 if __name__ == '__main__':
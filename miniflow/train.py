@@ -16,8 +16,14 @@ Alias MiniFlow APIs for TensorFlow APIs.
 
 import miniflow as tf
 tf.train.GradientDescentOptimizer
+tf.train.AdagradOptimizer
+tf.train.MomentumOptimizer
+tf.train.AdamOptimizer
 """
 
 from . import optimizer
 
 GradientDescentOptimizer = optimizer.GradientDescentOptimizer
+AdagradOptimizer = optimizer.AdagradOptimizer
+MomentumOptimizer = optimizer.MomentumOptimizer
+AdamOptimizer = optimizer.AdamOptimizer